@@ -0,0 +1,236 @@
+"""
+Benchmarks of the genetic algorithm hot paths.
+
+Run from the project root:
+
+    python -m benchmarks.bench --output generated/bench.json
+    python -m benchmarks.bench --baseline generated/bench.json
+
+Results are written as JSON (seconds per call, median and minimum of several repeats). With `--baseline`,
+every benchmark is compared against a previous output and the command fails if one got slower than
+`--threshold`, or if a check (like the live individual count staying flat) fails.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from PIL import Image
+
+from src.generator import Generator, SelectionType, CrossoverType, MutationType, GenerationJumpType, ShapeType, LabBackend
+from src.genes import Triangle
+from src.individual import Individual
+from src.rasterizer import render_batch
+
+IMAGES = ["polonia_mini.png", "small-argentina.png"]
+SHAPE_COUNTS = [50, 200]
+POPULATION = 50
+CHILDREN = 25
+
+class Suite:
+    def __init__(self, repeat: int, name_filter: Optional[str]) -> None:
+        self._repeat = repeat
+        self._filter = name_filter
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.checks: Dict[str, Dict[str, Any]] = {}
+
+    def wants(self, name: str) -> bool:
+        return self._filter is None or self._filter in name
+
+    def bench(self, name: str, setup: Callable[[], Any], func: Callable[[Any], Any], number: int = 1):
+        """
+        Time `func(setup())`, `number` calls per repeat. `setup` isn't timed, it runs before every call.
+        """
+        if not self.wants(name):
+            return
+        times: List[float] = []
+        for _ in range(self._repeat):
+            total = 0.0
+            for _ in range(number):
+                arg = setup()
+                start = time.perf_counter()
+                func(arg)
+                total += time.perf_counter() - start
+            times.append(total / number)
+        self.results[name] = {"median_s": statistics.median(times), "min_s": min(times), "repeat": self._repeat}
+        print(f"{name:<45} {statistics.median(times) * 1000:10.3f} ms")
+
+    def check(self, name: str, value: float, limit: float):
+        if not self.wants(name):
+            return
+        passed = value <= limit
+        self.checks[name] = {"value": value, "limit": limit, "passed": passed}
+        print(f"{name:<45} {value:10.0f} (limit {limit:.0f}){'' if passed else '  FAILED'}")
+
+def load_image(name: str) -> Image.Image:
+    return Image.open(f"./assets/{name}").convert("RGBA")
+
+def make_generator(img: Image.Image, shape_count: int, seed: int = 0, **kwargs) -> Generator:
+    random.seed(seed)
+    return Generator(
+        img, shape_count, ShapeType.TRIANGLE, POPULATION, SelectionType.ELITE, CrossoverType.TWO_POINT,
+        MutationType.UNIFORM, GenerationJumpType.YOUNG_BIAS, **kwargs
+    )
+
+def random_individuals(img: Image.Image, shape_count: int, count: int, seed: int = 0) -> List[Individual]:
+    rng = np.random.default_rng(seed)
+    vertices, colors = Triangle.random(rng, (count, shape_count), img.size)
+    return [Individual(vertices[i], colors[i], img.size) for i in range(count)]
+
+def bench_startup(suite: Suite):
+    """
+    Starting a new interpreter and importing the project, as every run and sweep job does. The perceptual
+    stack (colour and skimage) is only imported by the delta_D fitness with the skimage Lab backend.
+    """
+    statements = {
+        "startup/import": "import src.genetic_algorithm",
+        "startup/import_perceptual": "import src.perceptual; src.perceptual.load()",
+    }
+    for name, statement in statements.items():
+        suite.bench(name, lambda: statement, lambda statement: subprocess.run([sys.executable, "-c", statement], check=True, capture_output=True))
+
+def bench_render(suite: Suite):
+    for image in IMAGES:
+        img = load_image(image)
+        for shape_count in SHAPE_COUNTS:
+            def render(individuals: List[Individual]):
+                for ind in individuals:
+                    ind.pixels
+            suite.bench(
+                f"render/{image}/{shape_count}", lambda: random_individuals(img, shape_count, 10), render
+            )
+            genes = Triangle.random(np.random.default_rng(0), (10, shape_count), img.size)
+            suite.bench(
+                f"render_numpy/{image}/{shape_count}", lambda: genes, lambda genes: render_batch(*genes, img.size)
+            )
+
+def bench_fitness(suite: Suite):
+    for image in IMAGES:
+        img = load_image(image)
+        variants = {
+            "euclidean": {},
+            "euclidean_tiled": {"fitness_tiles": 4},
+            "delta_D": {"use_delta_D": True},
+            "delta_D_lut": {"use_delta_D": True, "lab_backend": LabBackend.LUT},
+            "delta_D_tiled": {"use_delta_D": True, "fitness_tiles": 4},
+        }
+        for variant, kwargs in variants.items():
+            name = f"fitness_{variant}/{image}"
+            if not suite.wants(name):
+                continue
+            gen = make_generator(img, SHAPE_COUNTS[0], **kwargs)
+            individuals = random_individuals(img, SHAPE_COUNTS[0], 10)
+            def rendered() -> List[Individual]:
+                # Rendered again so nothing computed by the last call (like the Lab array) is reused,
+                # only the fitness is timed.
+                for ind in individuals:
+                    ind.release()
+                    ind.pixels
+                return individuals
+            suite.bench(name, rendered, lambda inds: [gen.fitness_func(ind) for ind in inds])
+            gen.close()
+
+def bench_operators(suite: Suite):
+    img = load_image(IMAGES[0])
+    gen = make_generator(img, SHAPE_COUNTS[0])
+    for selection_type in SelectionType:
+        selection = gen.selections_candidates[selection_type]
+        suite.bench(f"selection/{selection_type.name.lower()}", lambda: CHILDREN, selection, number=20)
+    for crossover_type in CrossoverType:
+        crossover = gen.crossover_candidates[crossover_type]
+        suite.bench(f"crossover/{crossover_type.name.lower()}", lambda: gen.selection(CHILDREN), crossover, number=20)
+    for mutation_type in MutationType:
+        mutation = gen.mutation_cadidates[mutation_type]
+        suite.bench(f"mutation/{mutation_type.name.lower()}", lambda: gen.crossover(gen.selection(CHILDREN)), mutation, number=20)
+
+def bench_generations(suite: Suite, generations: int):
+    img = load_image(IMAGES[0])
+    for shape_count in SHAPE_COUNTS:
+        name = f"generation/{shape_count}"
+        if not suite.wants(name):
+            continue
+        def evolve(gen: Generator):
+            for _ in range(generations):
+                gen.new_generation(CHILDREN)
+        suite.bench(name, lambda: make_generator(img, shape_count, seed=1), evolve)
+        suite.results[name]["generations_per_s"] = generations / suite.results[name]["median_s"]
+        suite.results[name]["median_s"] /= generations
+        suite.results[name]["min_s"] /= generations
+        print(f"{name:<45} {suite.results[name]['generations_per_s']:10.2f} generations/s")
+
+def check_memory(suite: Suite, generations: int):
+    """
+    Individuals must not keep their ancestors alive: after many generations the live ones are only the
+    population and the last children, whatever scoring path was used.
+    """
+    img = load_image(IMAGES[0])
+    variants = {"default": {}, "delta_fitness": {"delta_fitness": True}, "fitness_cache": {"fitness_cache_size": 1000}}
+    for variant, kwargs in variants.items():
+        name = f"live_individuals/{variant}"
+        if not suite.wants(name):
+            continue
+        gen = make_generator(img, 3, seed=1, **kwargs)
+        for _ in range(generations):
+            gen.new_generation(CHILDREN)
+        gc.collect()
+        live = sum(isinstance(obj, Individual) for obj in gc.get_objects())
+        gen.close()
+        suite.check(name, live, POPULATION + CHILDREN)
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """
+    Print how every benchmark changed against `baseline`.
+
+    @returns `bool`: Whether none got slower than `threshold` (relative, on the median).
+    """
+    ok = True
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["median_s"] / baseline["results"][name]["median_s"]
+        regressed = ratio > 1 + threshold
+        ok = ok and not regressed
+        print(f"{name:<45} {ratio:8.2f}x{'  REGRESSION' if regressed else ''}")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the genetic algorithm hot paths.")
+    parser.add_argument("--output", "-o", type=str, default=None, help="JSON file where the results are written.")
+    parser.add_argument("--baseline", "-b", type=str, default=None, help="Previous results to compare against.")
+    parser.add_argument("--threshold", "-t", type=float, default=0.25, help="Relative slowdown that counts as a regression.")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Repeats of every benchmark, the median is reported.")
+    parser.add_argument("--generations", "-g", type=int, default=50, help="Generations of the end to end benchmark.")
+    parser.add_argument("--filter", "-f", type=str, default=None, help="Only run the benchmarks whose name contains this.")
+    args = parser.parse_args()
+
+    suite = Suite(args.repeat, args.filter)
+    bench_startup(suite)
+    bench_render(suite)
+    bench_fitness(suite)
+    bench_operators(suite)
+    bench_generations(suite, args.generations)
+    check_memory(suite, args.generations * 10)
+
+    results = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": suite.results,
+        "checks": suite.checks,
+    }
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    ok = all(check["passed"] for check in suite.checks.values())
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        ok = compare(results, baseline, args.threshold) and ok
+    sys.exit(0 if ok else 1)
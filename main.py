@@ -3,29 +3,44 @@ import argparse
 from pathlib import Path
 from PIL import Image
 from src.genetic_algorithm import ImageReconstructionGeneticAlgorithm
+from src.startup import print_import_profile
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run genetic image generator.")
     parser.add_argument("--image", "-i", type=str, required=True, help="Nombre del archivo de imagen.")
     parser.add_argument("--shape_count", "-s", type=int, required=True, help="Cantidad de figuras para cada individuo.")
+    parser.add_argument("--resume", "-r", type=str, default=None, help="Checkpoint desde el cual continuar una corrida.")
+    parser.add_argument("--startup-profile", action="store_true", help="Mostrar cuánto tardan en importarse los módulos antes de correr.")
     args = parser.parse_args()
 
     with open("configs/config.json", "r") as f:
         config = json.load(f)
 
+    if args.startup_profile:
+        print_import_profile("import src.genetic_algorithm")
+        if config["use_delta_D"] and config["lab_backend"] == "skimage":
+            # Only imported when this fitness is used.
+            print_import_profile("import src.perceptual; src.perceptual.load()")
+
     image_path = Path(args.image)
     reference_img = Image.open(f"{image_path}").convert("RGBA")
     # (w,h) = reference_img.size
     # reference_img.resize((w//2,h//2)).save(f"./assets/small-{image_path.name}")
 
     genetic_algorithm = ImageReconstructionGeneticAlgorithm(reference_img, args.shape_count)
-    fitness_evolution, elapsed_time = genetic_algorithm.run()
+    summary, elapsed_time = genetic_algorithm.run(resume_from=args.resume)
 
-    fittest_individual = max(fitness_evolution, key=lambda x: x['fittest'].fitness)
-    fittest = fittest_individual['fittest']
-    best_gen = fittest_individual['gen']
+    # Only generations at full resolution count, see pyramid mode.
+    if summary['last'] is None:
+        raise SystemExit("No generation was evolved.")
+    best = summary['best']
+    if best is None:
+        print("The run ended before reaching full resolution, saving its last generation instead.")
+        best = summary['last']
+    fittest = best['fittest']
+    best_gen = best['gen']
     fittest.img.save(f"./generated/{image_path.name}")
     print(f"Elapsed time: {elapsed_time}")
-    print(f"Final gen: {len(fitness_evolution) - 1}")
+    print(f"Final gen: {summary['last']['gen']}")
     print(f"Fittest gen: {best_gen}")
     print(f"Max fitness: {fittest.fitness}")
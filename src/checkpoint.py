@@ -0,0 +1,39 @@
+import os
+import random
+from typing import Dict
+import numpy as np
+
+def save_checkpoint(path: str, arrays: Dict[str, np.ndarray]):
+    """
+    Write `arrays` as a compressed `.npz` file. The file is written next to `path` and then renamed
+    over it, so an interrupted save never leaves a broken checkpoint behind.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+def random_state() -> Dict[str, np.ndarray]:
+    """
+    @returns The state of the `random` module as arrays, see `set_random_state`.
+    """
+    version, internal, gauss_next = random.getstate()
+    return {
+        "random_version": np.array(version),
+        "random_internal": np.array(internal, dtype=np.uint32),
+        "random_gauss_next": np.array(np.nan if gauss_next is None else gauss_next),
+    }
+
+def set_random_state(arrays: Dict[str, np.ndarray]):
+    gauss_next = float(arrays["random_gauss_next"])
+    random.setstate((
+        int(arrays["random_version"]),
+        tuple(int(x) for x in arrays["random_internal"]),
+        None if np.isnan(gauss_next) else gauss_next,
+    ))
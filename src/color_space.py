@@ -0,0 +1,64 @@
+import numpy as np
+
+# Fast 8-bit sRGB -> CIE Lab conversion for the delta_D fitness. It follows the same formulas and
+# constants as `skimage.color.rgb2lab` (sRGB primaries, D65 white, 2 degree observer), but the sRGB
+# linearization is a 256 entry lookup table and everything runs in `float32`.
+#
+# Tolerance against `rgb2lab` + `colour.difference.delta_E_CIE1976` in float64, checked over the whole
+# 8-bit RGB cube: every Lab component is within 2e-4 and every per-pixel delta E within 2e-4, so the
+# delta_D fitness (1 - mean/100) differs by less than 2e-6.
+
+_RGB_TO_XYZ = np.array([
+    [0.412453, 0.357580, 0.180423],
+    [0.212671, 0.715160, 0.072169],
+    [0.019334, 0.119193, 0.950227],
+])
+
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+def _srgb_to_linear_table() -> np.ndarray:
+    srgb = np.arange(256) / 255.0
+    return np.where(srgb > 0.04045, ((srgb + 0.055) / 1.055) ** 2.4, srgb / 12.92).astype(np.float32)
+
+_SRGB_TO_LINEAR = _srgb_to_linear_table()
+
+# Maps linear RGB straight to XYZ already scaled by the reference white, as a right-hand operand.
+_LINEAR_RGB_TO_WHITE_XYZ = (_RGB_TO_XYZ / _D65_WHITE[:, None]).T.astype(np.float32)
+# Same for BGR, so cairo frames don't need their channels reordered.
+_LINEAR_BGR_TO_WHITE_XYZ = np.ascontiguousarray(_LINEAR_RGB_TO_WHITE_XYZ[::-1])
+
+def bgra_to_lab(frame: np.ndarray) -> np.ndarray:
+    """
+    Convert an 8-bit frame in cairo's BGRA order to Lab.
+
+    @param `frame: np.ndarray`: `uint8` array of shape `(..., 4)`, alpha is ignored.
+    @returns `np.ndarray`: `float32` array of shape `(..., 3)` with L, a and b.
+    """
+    return _linear_to_lab(_SRGB_TO_LINEAR.take(frame[..., :3]), _LINEAR_BGR_TO_WHITE_XYZ)
+
+def rgb_to_lab(frame: np.ndarray) -> np.ndarray:
+    """
+    Like `bgra_to_lab` for an 8-bit RGB(A) frame, e.g. `np.asarray` of a Pillow image.
+    """
+    return _linear_to_lab(_SRGB_TO_LINEAR.take(frame[..., :3]), _LINEAR_RGB_TO_WHITE_XYZ)
+
+def _linear_to_lab(linear: np.ndarray, to_white_xyz: np.ndarray) -> np.ndarray:
+    xyz = linear @ to_white_xyz
+
+    small = xyz <= 0.008856
+    near_black = 7.787 * xyz[small] + 16.0 / 116.0
+    np.cbrt(xyz, out=xyz)
+    xyz[small] = near_black
+
+    lab = np.empty(xyz.shape, dtype=np.float32)
+    lab[..., 0] = 116.0 * xyz[..., 1] - 16.0
+    lab[..., 1] = 500.0 * (xyz[..., 0] - xyz[..., 1])
+    lab[..., 2] = 200.0 * (xyz[..., 1] - xyz[..., 2])
+    return lab
+
+def delta_e(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """
+    CIE1976 delta E (euclidean distance in Lab) of every pixel, in `float32`.
+    """
+    diff = np.subtract(lab1, lab2, dtype=np.float32)
+    return np.sqrt(np.einsum("...i,...i->...", diff, diff))
@@ -1,16 +1,27 @@
+import bisect
 import math
 import random
 import numpy as np
 import random
-import colour
+import json
+import threading
+from collections import OrderedDict
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from math import ceil
-from typing import Callable, Dict, List
-from skimage.color import rgb2lab
-from PIL import Image, ImageChops
-from src.genes import Shape, Square, Triangle
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from PIL import Image
+from src import perceptual
+from src.color_space import bgra_to_lab, delta_e, rgb_to_lab
+from src.genes import Square, Triangle
 from src.individual import Individual
-from src.utils import randint, swap_in_arr
+from src.profiling import PhaseTimer
+from src.rasterizer import RenderBackend, render_batch
+from src.surface_pool import SurfacePool
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 class ShapeType(Enum):
     TRIANGLE = "Triangle"
@@ -49,6 +60,15 @@ class MutationType(Enum):
 class GenerationJumpType(Enum):
     TRADITIONAL = 1
     YOUNG_BIAS = 2
+    STEADY_STATE = 3
+
+    @classmethod
+    def from_string(cls, name: str):
+        return cls[name.upper()]
+
+class LabBackend(Enum):
+    SKIMAGE = 1
+    LUT = 2
 
     @classmethod
     def from_string(cls, name: str):
@@ -65,19 +85,85 @@ class Generator:
         crossover_type: CrossoverType,
         mutation_type: MutationType,
         generation_jump_type: GenerationJumpType,
-        use_delta_D: bool = False
+        use_delta_D: bool = False,
+        evaluation_workers: int = 0,
+        render_checkpoint_interval: int = 0,
+        delta_fitness: bool = False,
+        fitness_cache_size: int = 0,
+        lab_backend: LabBackend = LabBackend.SKIMAGE,
+        state: Optional[Dict[str, np.ndarray]] = None,
+        profile: bool = False,
+        render_backend: RenderBackend = RenderBackend.CAIRO,
+        fitness_tiles: int = 0,
+        reference: Optional[Dict[str, np.ndarray]] = None
     ) -> None:
-        self.og_img = og_img
+        """
+        @param `state`: Population and evolution state returned by `state` to start from, instead of
+        a random initial population.
+        @param `profile`: Time every phase of the generations, see `profiler`.
+        @param `render_backend`: Draw individuals with cairo or with the NumPy rasterizer, which renders
+        the pending individuals of a generation in small batches, see `RENDER_CHUNK`.
+        @param `fitness_tiles`: Compare every individual to the reference in this many row bands at once,
+        on threads of their own, see `fitness_tiled`. 0 or 1 compares the whole image at once.
+        @param `reference`: `reference_arrays` of `og_img` to compare against instead of computing them,
+        e.g. views of memory shared with other processes. They're never modified.
+        """
+        # Selection, crossover, mutation, replacement, render, lab and fitness time and calls.
+        self.profiler = PhaseTimer(profile)
+        self.render_checkpoint_interval = render_checkpoint_interval
+        self.render_backend = render_backend
+        # Individuals scored without their pixels (cache hits, same genes as a parent) can't be told apart
+        # before scoring, so those only render when they need to.
+        self._batch_render = render_backend == RenderBackend.NUMPY and not delta_fitness and fitness_cache_size <= 0
+
+        # Rendering (cairo) and the fitness kernels (Pillow/NumPy) release the GIL,
+        # so a thread pool is enough to spread children over several cores.
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.evaluation_workers = max(1, evaluation_workers)
+        if evaluation_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=evaluation_workers)
+        # Tiles get their own threads: an evaluation worker waiting on its tiles must not take a worker
+        # the tiles need.
+        self.fitness_tiles = fitness_tiles
+        self._tile_executor: Optional[ThreadPoolExecutor] = None
+        if fitness_tiles > 1:
+            self._tile_executor = ThreadPoolExecutor(max_workers=fitness_tiles)
+
+        # Canvases are only borrowed while rendering and scoring, at most a chunk per worker at once.
+        self.surface_pool = SurfacePool(og_img.size, self.evaluation_workers * self.RENDER_CHUNK)
 
         self.use_delta_D = use_delta_D
+        self.lab_backend = lab_backend
+        # Scratch buffers for the per-pixel differences, one per evaluation thread.
+        self._scratch = threading.local()
+        if use_delta_D and lab_backend == LabBackend.SKIMAGE:
+            # Only this fitness needs it. Imported here rather than in the first (timed) evaluation.
+            perceptual.load()
+        self._set_reference(og_img, reference)
 
-        if use_delta_D:
-            rgb = np.asarray(og_img.convert("RGB")) / 255.0
-            self.lab = rgb2lab(rgb)
+        if use_delta_D and lab_backend == LabBackend.LUT:
+            self.fitness_func = self.fitness_delta_D_lut
+        elif use_delta_D:
             self.fitness_func = self.fitness_delta_D
         else:
             self.fitness_func = self.fitness_euclidean
 
+        if fitness_tiles > 1:
+            self.fitness_func = self.fitness_tiled
+
+        if delta_fitness:
+            self.fitness_func = self.fitness_incremental
+
+        # LRU of already scored genomes, keyed by `Individual.genome_hash`.
+        self.fitness_cache_size = fitness_cache_size
+        self._fitness_cache: OrderedDict[bytes, float] = OrderedDict()
+        self._fitness_cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        if fitness_cache_size > 0:
+            self._uncached_fitness_func = self.fitness_func
+            self.fitness_func = self.fitness_cached
+
         self.shape_count = shape_count
         if shape_type == ShapeType.TRIANGLE:
             self.shape = Triangle
@@ -89,47 +175,379 @@ class Generator:
         self.generation = 0
         self.population = initial_pop
 
+        # Individuals scored so far, one per new individual that survived the generation jump (or, in steady
+        # state, per child), immigrant or reseeded one, plus the rescored ones. See also `take_evaluations`.
+        self.evaluations = 0
+        self._untaken_evaluations = 0
+        self._evaluations_lock = threading.Lock()
+
         self._create_candidates_dicts()
         self.selection = self.selections_candidates[selection_type]
         self.crossover = self.crossover_candidates[crossover_type]
         self.mutation = self.mutation_cadidates[mutation_type]
         self.init_mutation = 0.9
         self.mutation_prob = self.init_mutation
+        # Generation the mutation schedule starts from, moved forward by `reheat`.
+        self.mutation_origin = 0
         self.generation_jump = self.generation_jump_candidates[generation_jump_type]
 
+        # Genome operations draw from their own NumPy generator, seeded from `random` so a
+        # single `random.seed` still fixes the whole run.
+        self.rng = np.random.default_rng(random.getrandbits(64))
+
         self.individuals: List[Individual] = []
+        # While not `None`, `individuals` is sorted from the fittest down and this holds their negated
+        # fitness in the same order (ascending), see `_population_index`.
+        self._ranked: Optional[List[float]] = None
+        # Exact sums of the fitness and squared fitness of the indexed population, see `fitness_stats`.
+        # Only valid while `_ranked` isn't `None`.
+        self._ranked_sums = [0, 0]
+        if state is not None:
+            self.load_state(state)
+            return
+        vertices, colors = self.shape.random(self.rng, (initial_pop, shape_count), og_img.size)
+        self.individuals = self._build_children(vertices, colors)
+        self._evaluate_population()
+
+    # Individuals the NumPy rasterizer draws at once per worker. Their shapes' coverage is computed
+    # together, but past a few individuals bigger batches only keep more frames alive.
+    RENDER_CHUNK = 4
+
+    @staticmethod
+    def reference_arrays(og_img: Image.Image, lab_backends: Iterable[LabBackend] = ()) -> Dict[str, np.ndarray]:
+        """
+        @returns The reference in the formats the fitness functions compare against: `"bgra"` and
+        `"lab_<backend>"` for every given Lab backend.
+        """
+        # The reference in the layout of a cairo ARGB32 surface in memory (BGRA on little endian), so
+        # rendered frames can be compared in place. It isn't premultiplied, the same way rendered frames
+        # were compared as straight RGBA before; both are the same for an opaque reference.
+        arrays = {"bgra": np.ascontiguousarray(np.asarray(og_img.convert("RGBA"))[..., [2, 1, 0, 3]])}
+        for lab_backend in set(lab_backends):
+            if lab_backend == LabBackend.LUT:
+                arrays["lab_lut"] = rgb_to_lab(np.asarray(og_img.convert("RGB")))
+            else:
+                rgb = np.asarray(og_img.convert("RGB")) / 255.0
+                arrays["lab_skimage"] = perceptual.rgb2lab(rgb)
+        return arrays
+
+    def _set_reference(self, og_img: Image.Image, reference: Optional[Dict[str, np.ndarray]] = None):
+        self.og_img = og_img
+        lab_key = f"lab_{self.lab_backend.name.lower()}"
+        width, height = og_img.size
+        if (
+            reference is None or reference["bgra"].shape[:2] != (height, width)
+            or (self.use_delta_D and lab_key not in reference)
+        ):
+            reference = self.reference_arrays(og_img, [self.lab_backend] if self.use_delta_D else [])
+        self._og_bgra = reference["bgra"]
+        if self.use_delta_D:
+            self.lab = reference[lab_key]
+
+        # `(y0, y1)` rows of every band of `fitness_tiled`, as even as possible.
+        height = og_img.size[1]
+        rows = np.linspace(0, height, min(max(1, self.fitness_tiles), height) + 1).astype(int)
+        self.tile_bounds: List[Tuple[int, int]] = list(zip(rows[:-1].tolist(), rows[1:].tolist()))
+
+    def change_reference(self, og_img: Image.Image):
+        """
+        Keep evolving the current population against another version of the reference, usually the
+        same image at a different resolution. Every individual's vertices are scaled to the new size
+        and the population is scored again. Generation count and mutation schedule carry on.
+        """
+        self._set_reference(og_img)
+        self.surface_pool.resize(og_img.size)
+        # Scores for the old reference are meaningless now.
+        with self._fitness_cache_lock:
+            self._fitness_cache.clear()
+        for ind in self.individuals:
+            ind.rescale(og_img.size)
+        self._ranked = None
+        self._evaluate_population()
+
+    def emigrants(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        @returns `(vertices, colors)`: Copies of the genes of the `count` fittest individuals.
+        """
+        if self._ranked is not None:
+            return self._stack_genes(self.individuals[:count])
+        fittest = sorted(self.individuals, key=self._fittest_sort, reverse=True)[:count]
+        return self._stack_genes(fittest)
+
+    def immigrate(self, vertices: np.ndarray, colors: np.ndarray):
+        """
+        Replace the least fit individuals with new ones built from the given genes (batch arrays
+        like the ones `emigrants` returns).
+        """
+        newcomers = self._build_children(vertices, colors)[:len(self.individuals)]
+        if len(newcomers) == 0:
+            return
+        self.individuals.sort(key=self._fittest_sort, reverse=True)
+        self.individuals[-len(newcomers):] = newcomers
+        self._ranked = None
+        self._evaluate_population()
+
+    def reseed(self, count: int):
+        """
+        Replace the `count` least fit individuals with random ones.
+        """
+        vertices, colors = self.shape.random(self.rng, (count, self.shape_count), self.og_img.size)
+        self.immigrate(vertices, colors)
+
+    def reheat(self):
+        """
+        Restart the mutation schedule from its initial probability at the current generation.
+        """
+        self.mutation_origin = self.generation
+        self.mutation_prob = self.init_mutation
+
+    def diversity(self) -> float:
+        """
+        @returns `float`: Mean, over every gene value, of its standard deviation across the population, with
+        vertices relative to the image size and colors in [0, 1]. 0 when every individual has the same genome.
+        """
+        vertices, colors = self._stack_genes(self.individuals)
+        vertices = vertices / np.array(self.og_img.size, dtype=np.float64)
+        return float((vertices.std(axis=0).sum() + colors.std(axis=0).sum()) / (vertices[0].size + colors[0].size))
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """
+        @returns Everything needed to continue this evolution later with `load_state`: genes and
+        fitness of the population (in its current order), generation, mutation probability and schedule
+        origin, and the state of the genome random generator.
+        """
+        vertices, colors = self._stack_genes(self.individuals)
+        return {
+            "vertices": vertices,
+            "colors": colors,
+            "fitness": self.fitness_vector(),
+            "generation": np.array(self.generation),
+            "mutation_prob": np.array(self.mutation_prob),
+            "mutation_origin": np.array(self.mutation_origin),
+            "rng_state": np.array(json.dumps(self.rng.bit_generator.state)),
+        }
 
-        for _ in range(initial_pop):
-            shapes: List[Shape] = []
-            for _ in range(shape_count):
-                shapes.append(self.shape.random(og_img.size))
-            individual = Individual(shapes, og_img.size, self.use_delta_D)
-            self.individuals.append(individual)
+    def load_state(self, state: Dict[str, np.ndarray]):
+        """
+        Replace the population and evolution state with one returned by `state`. The reference image
+        must be the one the state was saved with.
+        """
+        self.individuals = self._build_children(state["vertices"], state["colors"])
+        for ind, fitness in zip(self.individuals, state["fitness"].tolist()):
+            ind.set_fitness(fitness)
+        self._ranked = None
+        self.population = len(self.individuals)
+        self.generation = int(state["generation"])
+        self.mutation_prob = float(state["mutation_prob"])
+        # Checkpoints from before `reheat` existed never moved it.
+        self.mutation_origin = int(state["mutation_origin"]) if "mutation_origin" in state else 0
+        self.rng.bit_generator.state = json.loads(str(state["rng_state"]))
+
+    def close(self):
+        """
+        Release the evaluation and tile workers, if any.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._tile_executor is not None:
+            self._tile_executor.shutdown()
+            self._tile_executor = None
+
+    def _map(self, func: Callable[[T], R], items: List[T]) -> List[R]:
+        """
+        Apply `func` to every item, on the evaluation workers when there are any.
+        Results keep the order of `items`.
+        """
+        if self._executor is None:
+            return [func(item) for item in items]
+        return list(self._executor.map(func, items))
+
+    def _build_children(
+        self, vertices: np.ndarray, colors: np.ndarray, parents: Optional[List[Tuple[Individual, Individual]]] = None
+    ) -> List[Individual]:
+        """
+        @param `parents`: For every child, the individuals it was created from. Their render checkpoints
+        are reused so a child only redraws from its first shape that differs from one of them.
+        """
+        return [
+            Individual(
+                vertices[i], colors[i], self.og_img.size, self.render_checkpoint_interval,
+                parents[i] if parents else (), self.render_backend, self.surface_pool
+            )
+            for i in range(len(vertices))
+        ]
+
+    @staticmethod
+    def _stack_genes(individuals: List[Individual]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        @returns `(vertices, colors)` batch arrays of shape `(len(individuals), shape_count, ...)`.
+        """
+        return (
+            np.stack([ind.vertices for ind in individuals]),
+            np.stack([ind.colors for ind in individuals]),
+        )
+
+    def _pair_parents(
+        self, selection: List[Individual]
+    ) -> Tuple[List[Tuple[Individual, Individual]], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Randomly pair the selected individuals, each one is used once (if the amount is odd
+        one of them is left out). There must be at least 2 of them.
+
+        @returns `(pairs, vertices1, colors1, vertices2, colors2)` with the pairs and the genes of
+        the first and second parent of every pair.
+        """
+        pair_count = len(selection) // 2
+        order = self.rng.permutation(len(selection))[:2*pair_count]
+        shuffled = [selection[i] for i in order]
+        pairs = list(zip(shuffled[0::2], shuffled[1::2]))
+        vertices, colors = self._stack_genes(shuffled)
+        return pairs, vertices[0::2], colors[0::2], vertices[1::2], colors[1::2]
+
+    def _crossover_children(
+        self,
+        pairs: List[Tuple[Individual, Individual]],
+        swap: np.ndarray,
+        vertices1: np.ndarray,
+        colors1: np.ndarray,
+        vertices2: np.ndarray,
+        colors2: np.ndarray
+    ) -> List[Individual]:
+        """
+        Each pair creates two children, the first one takes the genes of the second parent where `swap`
+        is true and the ones of the first parent elsewhere, the other child does the opposite.
+        """
+        vertex_swap = swap[..., None, None]
+        color_swap = swap[..., None]
+        # Interleave the two children of each pair so siblings end up next to each other.
+        vertices = np.stack((
+            np.where(vertex_swap, vertices2, vertices1),
+            np.where(vertex_swap, vertices1, vertices2),
+        ), axis=1).reshape(-1, *vertices1.shape[1:])
+        colors = np.stack((
+            np.where(color_swap, colors2, colors1),
+            np.where(color_swap, colors1, colors2),
+        ), axis=1).reshape(-1, *colors1.shape[1:])
+        return self._build_children(vertices, colors, [pair for pair in pairs for _ in range(2)])
+
+    def _evaluate_population(self):
+        """
+        Compute the fitness of every individual that doesn't have one yet, which is where they get
+        rendered. Only the individuals that survived the generation jump get here, so discarded children
+        are never drawn. All the random decisions were already taken, so the result doesn't depend on the
+        amount of workers.
+
+        Each individual gives its canvas back to the pool as soon as it's scored, and afterwards only the
+        fittest keeps its pixels. The rest can render again if they're ever needed.
+        """
+        self.evaluate(self.individuals)
+
+        fittest = self.fittest
+        for ind in self.individuals:
+            if ind is not fittest:
+                ind.release()
+
+    def evaluate(self, individuals: List[Individual]):
+        """
+        The evaluation stage: score, all at once (as a batch and on the evaluation workers if there are
+        any), the individuals of the list that don't have a fitness yet. This is the only place where
+        fitness is computed, selection and replacement read the stored values.
+        """
+        individuals = [ind for ind in individuals if ind.fitness < 0]
+        with self._evaluations_lock:
+            self.evaluations += len(individuals)
+            self._untaken_evaluations += len(individuals)
+        if self._batch_render:
+            chunks = [individuals[i:i + self.RENDER_CHUNK] for i in range(0, len(individuals), self.RENDER_CHUNK)]
+            self._map(self._render_score_and_release, chunks)
+        else:
+            self._map(self._score_and_release, individuals)
+
+    def _render_score_and_release(self, chunk: List[Individual]):
+        """
+        Draw the chunk with the NumPy rasterizer, then score it and give its frames back before the worker
+        takes the next one.
+        """
+        pending = [ind for ind in chunk if not ind.rendered]
+        if len(pending) > 0:
+            with self.profiler.phase("render", len(pending)):
+                vertices, colors = self._stack_genes(pending)
+                out = [self.surface_pool.frame() for _ in pending]
+                for ind, frame in zip(pending, render_batch(vertices, colors, self.og_img.size, out=out)):
+                    ind.set_pixels(frame)
+        for ind in chunk:
+            self._score_and_release(ind)
+
+    def take_evaluations(self) -> int:
+        """
+        @returns `int`: Evaluations since the last call (or since the generator was created), the count
+        starts again from 0. Besides `new_generation`'s, it includes the ones of `immigrate`, `reseed` and
+        `change_reference` in between.
+        """
+        with self._evaluations_lock:
+            evaluations, self._untaken_evaluations = self._untaken_evaluations, 0
+        return evaluations
 
     def _fittest_sort(self, individual: Individual) -> float:
         if individual.fitness < 0:
+            raise RuntimeError("Fitness read before evaluating the individual, see `evaluate`.")
+        return individual.fitness
+
+    def _score(self, individual: Individual) -> float:
+        with self.profiler.phase("fitness"):
             return self.fitness_func(individual)
-        else:
-            return individual.fitness
+
+    def _score_and_release(self, individual: Individual) -> float:
+        fitness = self._score(individual)
+        individual.release()
+        return fitness
+
+    def _pixels(self, individual: Individual) -> np.ndarray:
+        """
+        `individual.pixels`, with the render timed on its own.
+        """
+        if not individual.rendered:
+            with self.profiler.phase("render"):
+                return individual.pixels
+        return individual.pixels
 
     @property
     def fittest(self) -> Individual:
+        if self._ranked is not None:
+            return self.individuals[0]
         return max(self.individuals, key=self._fittest_sort)
 
     def fitness_delta_D(self, individual: Individual) -> float:
-        if individual.img.size != self.og_img.size:
+        if individual.img_size != self.og_img.size:
             raise ValueError("Images must have the same dimensions.")
 
-        diff = colour.difference.delta_e.delta_E_CIE1976(self.lab, individual.lab)
+        self._pixels(individual)
+        with self.profiler.phase("lab"):
+            lab = individual.lab
+        diff = perceptual.delta_E_CIE1976(self.lab, lab)
 
-        mean = np.mean(diff)
-        fitness = 1 - (mean / 100)
+        fitness = self._delta_D_fitness(np.mean(diff))
+        individual.set_fitness(fitness)
+        return fitness
+    
+    def fitness_delta_D_lut(self, individual: Individual) -> float:
+        """
+        `fitness_delta_D` computed in `float32` with the lookup table Lab conversion of `src.color_space`,
+        within 2e-6 of it.
+        """
+        if individual.img_size != self.og_img.size:
+            raise ValueError("Images must have the same dimensions.")
 
-        fitness = max(0.0, min(1.0, float(fitness)))
+        pixels = self._pixels(individual)
+        with self.profiler.phase("lab"):
+            lab = bgra_to_lab(pixels)
+        diff = delta_e(self.lab, lab)
 
+        fitness = self._delta_D_fitness(np.mean(diff, dtype=np.float64))
         individual.set_fitness(fitness)
         return fitness
-    
+
     def fitness_euclidean(self, individual: Individual) -> float:
         """
         Calculate the fitness of an individual by comparing its image to the original image.
@@ -137,23 +555,240 @@ class Generator:
         @param `individual: Individual`: The individual whose fitness is to be evaluated.
         @returns `np.double`: A value in the range (0, 1], with 1 representing a perfect match.
         """
-        if individual.img.size != self.og_img.size:
+        if individual.img_size != self.og_img.size:
             raise ValueError("Images must have the same dimensions.")
 
-        diff = ImageChops.difference(individual.img, self.og_img)
-        np_diff = np.array(diff)
+        # Works directly on the surface memory, no image or difference copies are allocated.
+        diff = self._scratch_buffer(self._og_bgra.shape)
+        np.subtract(self._pixels(individual), self._og_bgra, out=diff, dtype=np.int16)
+        np.abs(diff, out=diff)
 
-        mean = np.mean(np_diff)/255
-        individual.set_fitness(float(1 - mean)**2)
+        individual.set_fitness(self._euclidean_fitness(int(np.sum(diff, dtype=np.int64)), diff.size))
         return individual.fitness
 
+    @staticmethod
+    def _euclidean_fitness(error_total: int, values: int) -> float:
+        """
+        @param `error_total`: Sum of the absolute difference of every channel of every pixel.
+        @param `values`: Amount of channel values compared.
+        """
+        mean = error_total / values / 255
+        return float(1 - mean)**2
+
+    @staticmethod
+    def _delta_D_fitness(mean: float) -> float:
+        """
+        @param `mean`: Mean delta E of the pixels.
+        """
+        return max(0.0, min(1.0, float(1 - (mean / 100))))
+
+    def fitness_tiled(self, individual: Individual) -> float:
+        """
+        Same value as `fitness_euclidean` / `fitness_delta_D` / `fitness_delta_D_lut`, exactly, computed on
+        the `tile_bounds` row bands of the image at once (NumPy releases the GIL). Integer errors are summed
+        per band and the sums added up; float errors are written by band into one error map that's then
+        reduced like the whole image version does, so the rounding is the same.
+        """
+        if individual.img_size != self.og_img.size:
+            raise ValueError("Images must have the same dimensions.")
+
+        if self.use_delta_D:
+            error_map, _ = self.tiled_error_map(individual)
+            fitness = self._delta_D_fitness(np.mean(error_map, dtype=np.float64))
+        else:
+            band_totals = self._map_tiles(partial(self._euclidean_band, self._pixels(individual), None))
+            fitness = self._euclidean_fitness(sum(band_totals), self._og_bgra.size)
+        individual.set_fitness(fitness)
+        return fitness
+
+    def tiled_error_map(self, individual: Individual) -> Tuple[np.ndarray, List[int]]:
+        """
+        The per pixel error of the individual (like `_error_map`, but `float64` for `fitness_delta_D`),
+        computed by `tile_bounds` bands on the tile threads. The error of one band is `error_map[y0:y1]`.
+
+        @returns `(error_map, band_totals)`: `band_totals` has the exact error sum of every band for the
+        euclidean fitness, and is empty for delta_D.
+        """
+        pixels = self._pixels(individual)
+        width, height = self.og_img.size
+        if not self.use_delta_D:
+            error_map = np.empty((height, width), dtype=np.int16)
+            return error_map, self._map_tiles(partial(self._euclidean_band, pixels, error_map))
+
+        lut = self.lab_backend == LabBackend.LUT
+        error_map = np.empty((height, width), dtype=np.float32 if lut else np.float64)
+        def band(bounds: Tuple[int, int]):
+            y0, y1 = bounds
+            if lut:
+                error_map[y0:y1] = delta_e(self.lab[y0:y1], bgra_to_lab(pixels[y0:y1]))
+            else:
+                lab = perceptual.rgb2lab(pixels[y0:y1, :, 2::-1] / 255.0)
+                error_map[y0:y1] = perceptual.delta_E_CIE1976(self.lab[y0:y1], lab)
+        self._map_tiles(band)
+        return error_map, []
+
+    def _euclidean_band(self, pixels: np.ndarray, error_map: Optional[np.ndarray], bounds: Tuple[int, int]) -> int:
+        """
+        @param `error_map`: Where the error of every pixel of the band is written, `None` to only sum it.
+        @returns `int`: Sum of the absolute difference of every channel of the band's pixels.
+        """
+        y0, y1 = bounds
+        width, height = self.og_img.size
+        diff = self._scratch_buffer((ceil(height / len(self.tile_bounds)), width, 4))[:y1 - y0]
+        np.subtract(pixels[y0:y1], self._og_bgra[y0:y1], out=diff, dtype=np.int16)
+        np.abs(diff, out=diff)
+        if error_map is None:
+            return int(np.sum(diff, dtype=np.int64))
+        diff.sum(axis=2, dtype=np.int16, out=error_map[y0:y1])
+        return int(np.sum(error_map[y0:y1], dtype=np.int64))
+
+    def _map_tiles(self, func: Callable[[Tuple[int, int]], R]) -> List[R]:
+        """
+        Apply `func` to every band of `tile_bounds`, on the tile workers when there are any.
+        """
+        if self._tile_executor is None:
+            return [func(bounds) for bounds in self.tile_bounds]
+        return list(self._tile_executor.map(func, self.tile_bounds))
+
+    def _scratch_buffer(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        @returns `np.ndarray`: An `int16` buffer of the given shape owned by the calling thread, reused between calls.
+        """
+        buffer = getattr(self._scratch, "diff", None)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.int16)
+            self._scratch.diff = buffer
+        return buffer
+
+    def fitness_cached(self, individual: Individual) -> float:
+        """
+        Look up the individual's genome among the last `fitness_cache_size` scored ones before
+        rendering and scoring it.
+        """
+        if individual.fitness >= 0:
+            return individual.fitness
+
+        key = individual.genome_hash
+        with self._fitness_cache_lock:
+            fitness = self._fitness_cache.get(key)
+            if fitness is not None:
+                self._fitness_cache.move_to_end(key)
+                self.cache_hits += 1
+        if fitness is not None:
+            individual.set_fitness(fitness)
+            # Never rendered, which is where the parents are dropped otherwise.
+            individual.parents = ()
+            return fitness
+
+        fitness = self._uncached_fitness_func(individual)
+        with self._fitness_cache_lock:
+            self.cache_misses += 1
+            self._fitness_cache[key] = fitness
+            if len(self._fitness_cache) > self.fitness_cache_size:
+                self._fitness_cache.popitem(last=False)
+        return fitness
+
+    def fitness_incremental(self, individual: Individual) -> float:
+        """
+        Same value as `fitness_euclidean` / `fitness_delta_D` (exactly for the former, up to float rounding
+        for the latter), but computed from the per-pixel error of one of the individual's parents: only the
+        pixels inside the bounding box of the shapes that differ from that parent are compared again.
+        Individuals without a usable parent are compared over the whole image.
+        """
+        width, height = self.og_img.size
+        base, box = self._closest_scored_parent(individual)
+        x0, y0, x1, y1 = box
+
+        if base is None or base.error_map is None:
+            error_map = self._error_map(individual, box)
+            error_total = self._error_sum(error_map)
+        elif x1 <= x0 or y1 <= y0:
+            # Same genes as the parent. Error maps are never modified in place, so it can be shared.
+            error_map = base.error_map
+            error_total = base.error_total
+        else:
+            # Pixels outside `box` are drawn by the same shapes in the same order, so they keep the parent's error.
+            error_map = base.error_map.copy()
+            region = self._error_map(individual, box)
+            error_total = base.error_total - self._error_sum(base.error_map[y0:y1, x0:x1]) + self._error_sum(region)
+            error_map[y0:y1, x0:x1] = region
+
+        individual.error_map = error_map
+        individual.error_total = error_total
+        # Scored, the parents aren't needed anymore. Children with the parent's genes are never rendered,
+        # which is where they'd be dropped otherwise, and would keep the whole genealogy alive.
+        individual.parents = ()
+
+        if self.use_delta_D:
+            mean = error_total / (width * height)
+            fitness = max(0.0, min(1.0, float(1 - (mean / 100))))
+        else:
+            mean = error_total / (width * height * 4) / 255
+            fitness = float(1 - mean)**2
+        individual.set_fitness(fitness)
+        return fitness
+
+    def _closest_scored_parent(self, individual: Individual) -> Tuple[Optional[Individual], Tuple[int, int, int, int]]:
+        """
+        @returns `(parent, box)` where `box = (x0, y0, x1, y1)` bounds every pixel that may differ between the
+        individual and `parent`, for the scored parent with the smallest such box. `parent` is `None` (and `box`
+        the whole image) if there isn't one or the box would cover the whole image anyway.
+        """
+        width, height = self.og_img.size
+        best: Tuple[Optional[Individual], Tuple[int, int, int, int]] = (None, (0, 0, width, height))
+        best_area = width * height
+        for parent in individual.parents:
+            if (
+                parent.error_map is None or parent.shape_count != individual.shape_count
+                or parent.img_size != individual.img_size
+            ):
+                continue
+            changed = individual.changed_shapes(parent)
+            if not changed.any():
+                return parent, (0, 0, 0, 0)
+
+            # Old and new position of every changed shape, with a pixel of margin for antialiasing.
+            points = np.concatenate((individual.vertices[changed], parent.vertices[changed])).reshape(-1, 2)
+            x0, y0 = np.maximum(points.min(axis=0) - 1, 0)
+            x1, y1 = np.minimum(points.max(axis=0) + 2, (width, height))
+            area = max(0, x1 - x0) * max(0, y1 - y0)
+            if area < best_area:
+                best, best_area = (parent, (int(x0), int(y0), int(x1), int(y1))), area
+        return best
+
+    def _error_map(self, individual: Individual, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        @returns `np.ndarray`: The error of every pixel inside `box = (x0, y0, x1, y1)`. For the euclidean
+        fitness, the sum of the absolute difference of the 4 channels; for delta_D, the CIE1976 delta E.
+        """
+        x0, y0, x1, y1 = box
+        frame = self._pixels(individual)[y0:y1, x0:x1]
+        if self.use_delta_D and self.lab_backend == LabBackend.LUT:
+            with self.profiler.phase("lab"):
+                lab = bgra_to_lab(frame)
+            return delta_e(self.lab[y0:y1, x0:x1], lab)
+        if self.use_delta_D:
+            with self.profiler.phase("lab"):
+                lab = perceptual.rgb2lab(frame[..., 2::-1] / 255.0)
+            return perceptual.delta_E_CIE1976(self.lab[y0:y1, x0:x1], lab).astype(np.float32)
+        diff = np.subtract(frame, self._og_bgra[y0:y1, x0:x1], dtype=np.int16)
+        return np.abs(diff, out=diff).sum(axis=2, dtype=np.int16)
+
+    def _error_sum(self, error_map: np.ndarray) -> float:
+        # Integer errors are summed exactly, float ones in double precision.
+        if self.use_delta_D:
+            return float(np.sum(error_map, dtype=np.float64))
+        return int(np.sum(error_map, dtype=np.int64))
+
     def _elite_selection_individual_amount(self, selection_count: int, individual_idx: int) -> int:
         return ceil((selection_count - individual_idx)/self.population)
 
     def elite_selection(self, selection_count: int) -> List[Individual]:
-        self.individuals.sort(key=self.fitness_func, reverse=True)
+        if self._ranked is None:
+            self.individuals.sort(key=self._fittest_sort, reverse=True)
         selected = []
-        for i in range(0, self.population):
+        # Individuals past `selection_count` aren't picked.
+        for i in range(0, min(self.population, selection_count)):
             count = self._elite_selection_individual_amount(selection_count, i)
             # WARNING: individuals in `selected` will be references to the originals.
             selected.extend([self.individuals[i]] * count)
@@ -161,90 +796,50 @@ class Generator:
         return selected
 
     def two_point_crossover(self, selection: List[Individual]) -> List[Individual]:
-        children: List[Individual] = []
-        child_remaining = len(selection) 
-
-        while (child_remaining > 1):
-            idx1 = randint(0, child_remaining)
-            parent1 = selection[idx1]
-            swap_in_arr(selection, idx1, child_remaining - 1)
-            child_remaining -= 1
-
-            idx2 = randint(0, child_remaining)
-            parent2 = selection[idx2]
-            swap_in_arr(selection, idx2, child_remaining - 1)
-            child_remaining -= 1
-
-            # parent1 = selection[randint(0, len(selection))]
-            # child_remaining -= 1
-            # parent2 = selection[randint(0, len(selection))]
-            # child_remaining -= 1
-
-            l1 = randint(0, parent1.shape_count)
-            l2 = randint(l1, parent1.shape_count)
-
-            child_genes1 = parent1.shapes[:l1] + parent2.shapes[l1:l2] + parent1.shapes[l2:]
-            child_genes2 = parent2.shapes[:l1] + parent1.shapes[l1:l2] + parent2.shapes[l2:]
-            # Make sure that the shapes in the child are copies, not references.
-            # Necessary so during mutation we don't mutate the parents' genes too.
-            child_genes1 = [shape.clone() for shape in child_genes1]
-            child_genes2 = [shape.clone() for shape in child_genes2]
-            children.append(Individual(child_genes1, self.og_img.size, self.use_delta_D))
-            children.append(Individual(child_genes2, self.og_img.size, self.use_delta_D))
+        if len(selection) < 2:
+            return []
+        pairs, vertices1, colors1, vertices2, colors2 = self._pair_parents(selection)
+        pair_count = len(vertices1)
 
-        return children
+        l1 = self.rng.integers(0, self.shape_count, pair_count)
+        l2 = self.rng.integers(l1, self.shape_count)
+        gene_idx = np.arange(self.shape_count)
+        swap = (gene_idx >= l1[:, None]) & (gene_idx < l2[:, None])
+
+        return self._crossover_children(pairs, swap, vertices1, colors1, vertices2, colors2)
     
     def uniform_crossover(self, selection: List[Individual], prob_of_gen_swap: float = 0.5) -> List[Individual]:
-        children: List[Individual] = []
-        child_remaining = len(selection) 
-
-        while (child_remaining > 1):
-            idx1 = randint(0, child_remaining)
-            parent1 = selection[idx1]
-            swap_in_arr(selection, idx1, child_remaining - 1)
-            child_remaining -= 1
-
-            idx2 = randint(0, child_remaining)
-            parent2 = selection[idx2]
-            swap_in_arr(selection, idx2, child_remaining - 1)
-            child_remaining -= 1
-
-            child_gens1 = []
-            child_gens2 = []
-            for i in range(min(len(parent1.shapes), len(parent2.shapes))):
-                if random.random() < prob_of_gen_swap:
-                    child_gens1.append(parent2.shapes[i].clone())
-                    child_gens2.append(parent1.shapes[i].clone())
-                else:
-                    child_gens1.append(parent1.shapes[i].clone())
-                    child_gens2.append(parent2.shapes[i].clone())
-
-            children.append(Individual(child_gens1, self.og_img.size, self.use_delta_D))
-            children.append(Individual(child_gens2, self.og_img.size, self.use_delta_D))
-
-        return children
+        if len(selection) < 2:
+            return []
+        pairs, vertices1, colors1, vertices2, colors2 = self._pair_parents(selection)
+        swap = self.rng.random((len(vertices1), self.shape_count)) < prob_of_gen_swap
+        return self._crossover_children(pairs, swap, vertices1, colors1, vertices2, colors2)
 
     def uniform_mutation(self, children: List[Individual]):
-        for c in children:
-            to_send_to_back = []
-            to_send_to_front = []
-            for s in c.shapes:
-                rand_val = random.random()
-                if rand_val <= self.mutation_prob / 2: # 50% of mut_prob of changing the shape's properties
-                    s.mutate(self.og_img.size)
-                elif rand_val <= self.mutation_prob - self.mutation_prob/4: # 25% of mut_prob of moving the shape to the back
-                    to_send_to_back.append(s)
-                elif rand_val <= self.mutation_prob: # 25% of mut_prob of moving the shape to the front
-                    to_send_to_front.append(s)
-            for shape in to_send_to_back:
-                c.shapes.remove(shape)
-                c.shapes.append(shape)
-            for shape in to_send_to_front:
-                c.shapes.remove(shape)
-                c.shapes.insert(0, shape)      
+        if len(children) == 0:
+            return
+        vertices, colors = self._stack_genes(children)
+
+        rand_val = self.rng.random((len(children), self.shape_count))
+        to_mutate = rand_val <= self.mutation_prob / 2 # 50% of mut_prob of changing the shape's properties
+        to_send_to_back = ~to_mutate & (rand_val <= self.mutation_prob - self.mutation_prob/4) # 25% of mut_prob of moving the shape to the back
+        to_send_to_front = ~to_mutate & ~to_send_to_back & (rand_val <= self.mutation_prob) # 25% of mut_prob of moving the shape to the front
+
+        self.shape.mutate(self.rng, vertices, colors, to_mutate, self.og_img.size)
+
+        # Shapes sent to the front end up in reverse order (each one is put before the previous ones),
+        # the ones sent to the back keep their relative order.
+        pos = np.arange(self.shape_count)
+        draw_key = np.where(to_send_to_front, -pos - 1, np.where(to_send_to_back, self.shape_count + pos, pos))
+        order = np.argsort(draw_key, axis=1)
+        vertices = np.take_along_axis(vertices, order[:, :, None, None], axis=1)
+        colors = np.take_along_axis(colors, order[:, :, None], axis=1)
+
+        for i, c in enumerate(children):
+            c.set_genes(vertices[i], colors[i])
 
     def complete_mutation(self, children: List[Individual]):
-        if random.random() <= self.mutation_prob:
+        if self.rng.random() <= self.mutation_prob:
             self.uniform_mutation(children)
 
     def new_generation_young_bias(self, children: List[Individual]):
@@ -258,20 +853,95 @@ class Generator:
             new_gen = random.sample(children, self.population)
 
         self.individuals = new_gen
+        self._ranked = None
         self.generation += 1
 
     def new_generation_trad(self, children: List[Individual]):
         self.individuals.extend(children)
         new_gen = random.sample(self.individuals, self.population)
         self.individuals = new_gen
+        self._ranked = None
         self.generation += 1
 
+    def new_generation_steady_state(self, children: List[Individual]):
+        """
+        The children are scored right away and each one replaces the least fit individual, if it's fitter
+        than it. The rest of the population carries over, so a step should create few children.
+
+        Nothing here goes over the whole population: only the evicted individuals, the children and the
+        previous fittest (if it was overtaken) release their pixels, the rest already did.
+        """
+        self.evaluate(children)
+        keys = self._population_index()
+        fittest = self.individuals[0]
+        for child in children:
+            if child.fitness <= self.individuals[-1].fitness:
+                child.release()
+                continue
+            keys.pop()
+            evicted = self.individuals.pop()
+            self._index_fitness(evicted.fitness, -1)
+            evicted.release()
+            position = bisect.bisect_right(keys, -child.fitness)
+            keys.insert(position, -child.fitness)
+            self.individuals.insert(position, child)
+            self._index_fitness(child.fitness, 1)
+        for ind in (fittest, *children):
+            if ind is not self.individuals[0]:
+                ind.release()
+        self.generation += 1
+
+    def _population_index(self) -> List[float]:
+        """
+        Sort the population from the fittest down, once, and keep it sorted from then on: insertions and
+        evictions find their place with a binary search over the returned keys (negated fitness, ascending),
+        and the fittest ones are the first individuals.
+        """
+        if self._ranked is None:
+            self.individuals.sort(key=self._fittest_sort, reverse=True)
+            self._ranked = [-ind.fitness for ind in self.individuals]
+            self._ranked_sums = [0, 0]
+            for ind in self.individuals:
+                self._index_fitness(ind.fitness, 1)
+        return self._ranked
+
+    # Fitness values are in [0, 1], as multiples of 2**-1074 (the smallest double) they're exact integers.
+    _FITNESS_BITS = 1074
+
+    def _index_fitness(self, fitness: float, sign: int):
+        """
+        Add (`sign` 1) or remove (`sign` -1) a fitness from `_ranked_sums`. The sums are exact integers,
+        so they don't depend on the order individuals came and went in.
+        """
+        numerator, denominator = fitness.as_integer_ratio()
+        value = numerator << (self._FITNESS_BITS - denominator.bit_length() + 1)
+        self._ranked_sums[0] += sign * value
+        self._ranked_sums[1] += sign * value * value
+
+    def fitness_stats(self) -> Tuple[float, float]:
+        """
+        @returns `(mean, std)` of the population's fitness. While the population is indexed (steady state)
+        they come from sums kept up to date on every insertion and eviction, instead of going over it.
+        """
+        if self._ranked is None and self.generation_jump != self.new_generation_steady_state:
+            fitness = self.fitness_vector()
+            return float(fitness.mean()), float(fitness.std())
+        # Steady state indexes the population now rather than on its next step, so the result doesn't depend
+        # on whether it already was (e.g. right after resuming).
+        self._population_index()
+        total, squares = self._ranked_sums
+        count = len(self.individuals)
+        # Integer true division rounds correctly, the variance is exact up to that rounding.
+        mean = total / (count << self._FITNESS_BITS)
+        variance = (count * squares - total * total) / (count * count << 2 * self._FITNESS_BITS)
+        return mean, math.sqrt(variance)
+
     def deterministic_tournament_selection(self, child_amount: int) -> List[Individual]:
         candidate_num = max(2, child_amount // 4) # M individuals
         children = []
         while child_amount > 0:
             chosen_candidates = random.sample(self.individuals, candidate_num)
-            chosen_candidates.sort(key=self.fitness_func, reverse=True)
+            chosen_candidates.sort(key=self._fittest_sort, reverse=True)
             children.append(chosen_candidates[0])
             child_amount -= 1
         return children
@@ -281,7 +951,7 @@ class Generator:
         children = []
         while child_amount > 0:
             chosen_candidates = random.sample(self.individuals, 2)
-            chosen_candidates.sort(key=self.fitness_func, reverse=True)
+            chosen_candidates.sort(key=self._fittest_sort, reverse=True)
             rand_val = random.random()
             if rand_val < threshold:
                 children.append(chosen_candidates[0])
@@ -294,68 +964,75 @@ class Generator:
         # k: the lower number this is, the "slower" the temperature will decrease,
         # the number was calculated with a max_gen of 2000 in mind using k = -math.log(tc/t0) / max_gen
         temp = self._temperature(1.0, 0.1, 0.0023)
-        self._boltzmann_mean = np.mean([
-            math.exp(self.fitness_func(indi) / temp) for indi in self.individuals
-        ])
         return self._get_roulette_selection(
-            [random.uniform(0, 1) for _ in range(child_amount)],
-            lambda ind: self._boltzmann_pseudo_fitness(ind, temp)
+            self.rng.random(child_amount),
+            self._boltzmann_pseudo_fitness(self.fitness_vector(), temp)
         )
 
-    def _temperature(self, temp_i: float, temp_f: float, k: float):
-        return temp_f + (temp_i - temp_f)*math.exp(-k*self.generation)
+    def _temperature(self, temp_i: float, temp_f: float, k: float, origin: int = 0):
+        return temp_f + (temp_i - temp_f)*math.exp(-k*(self.generation - origin))
 
-    def _boltzmann_pseudo_fitness(self, ind: Individual, temp: float) -> float:
-        return float(math.exp(self.fitness_func(ind) / temp) / self._boltzmann_mean)
+    def _boltzmann_pseudo_fitness(self, fitness: np.ndarray, temp: float) -> np.ndarray:
+        weights = np.exp(fitness / temp)
+        return weights / np.mean(weights)
 
     def ranking_selection(self, child_amount: int) -> List[Individual]:
-        self.individuals.sort(key=self.fitness_func, reverse=True)
         return self._get_roulette_selection(
-            [random.uniform(0, 1) for _ in range(child_amount)],
-             self._ranking_pseudo_fitness
-    )
+            self.rng.random(child_amount),
+            self._ranking_pseudo_fitness(self.fitness_vector())
+        )
 
-    def _ranking_pseudo_fitness(self, ind: Individual) -> float:
-        return (self.population - self.individuals.index(ind)) / self.population
+    def _ranking_pseudo_fitness(self, fitness: np.ndarray) -> np.ndarray:
+        # Rank 0 is the fittest, ties keep the population order.
+        ranks = np.empty(len(fitness), dtype=np.int64)
+        ranks[np.argsort(-fitness, kind="stable")] = np.arange(len(fitness))
+        return (self.population - ranks) / self.population
         
     def universal_selection(self, child_amount: int) -> List[Individual]:
-        rand_values = []
-        for j in range(child_amount):
-            rand_val = random.uniform(0, 1)
-            rand_values.append((rand_val + j) / child_amount)
-        return self._get_roulette_selection(rand_values, self.fitness_func)
+        rand_values = (self.rng.random(child_amount) + np.arange(child_amount)) / child_amount
+        return self._get_roulette_selection(rand_values, self.fitness_vector())
         
     def roulette_selection(self, child_amount: int) -> List[Individual]:
-        return self._get_roulette_selection([random.uniform(0, 1) for _ in range(child_amount)], self.fitness_func)
-
-    def _get_roulette_selection(self, rand_values: List[float], fitness_func: Callable[[Individual], float]) -> List[Individual]:
-        fitness_sum = np.sum([fitness_func(ind) for ind in self.individuals])
-
-        accum_relative_fitness = []
-        current_rel_fit = 0
-        for i, ind in enumerate(self.individuals):
-            current_rel_fit += fitness_func(ind) / fitness_sum
-            accum_relative_fitness.append(1 if (i+1) == len(self.individuals) else current_rel_fit)
-
-        to_return = []
-        for rand_val in rand_values:
-            left_range = 0
-            for ind, rel_fit in zip(self.individuals, accum_relative_fitness):
-                right_range = rel_fit
-                if left_range < rand_val and rand_val <= right_range:
-                    to_return.append(ind)
-                    break
-                left_range = rel_fit
-        return to_return
+        return self._get_roulette_selection(self.rng.random(child_amount), self.fitness_vector())
+
+    def fitness_vector(self) -> np.ndarray:
+        """
+        @returns `np.ndarray`: The fitness of every individual, in population order.
+        """
+        return np.fromiter((self._fittest_sort(ind) for ind in self.individuals), dtype=np.float64, count=len(self.individuals))
+
+    def _get_roulette_selection(self, rand_values: np.ndarray, weights: np.ndarray) -> List[Individual]:
+        """
+        Pick, for every value in [0, 1), the individual whose slice of the accumulated relative
+        `weights` contains it.
+        """
+        accum_relative_fitness = np.cumsum(weights) / np.sum(weights)
+        accum_relative_fitness[-1] = 1
+        picked = np.searchsorted(accum_relative_fitness, rand_values, side="left")
+        return [self.individuals[i] for i in picked]
 
     # The idea would be to somehow pass as parameter which selection, crossover and mutation
     # methods we want to use.
     def new_generation(self, selection_count: int):
-        selection = self.selection(selection_count)
-        children = self.crossover(selection)
-        self.mutation(children)
-        self.generation_jump(children)
-        self.mutation_prob = self._temperature(self.init_mutation, 0.08, 0.0014)
+        """
+        @param `selection_count`: Individuals selected to create the children from. Steady state
+        uses at least 2, crossover needs a pair and the population would never change otherwise.
+        """
+        steady_state = self.generation_jump == self.new_generation_steady_state
+        if steady_state:
+            selection_count = max(2, selection_count)
+        with self.profiler.phase("selection"):
+            selection = self.selection(selection_count)
+        with self.profiler.phase("crossover"):
+            children = self.crossover(selection)
+        with self.profiler.phase("mutation"):
+            self.mutation(children)
+        with self.profiler.phase("replacement"):
+            self.generation_jump(children)
+        if not steady_state:
+            # Steady state already scored the children and released the pixels it had to.
+            self._evaluate_population()
+        self.mutation_prob = self._temperature(self.init_mutation, 0.08, 0.0014, self.mutation_origin)
 
     def _create_candidates_dicts(self):
         self.selections_candidates: Dict[SelectionType, Callable[[int], List[Individual]]] = {
@@ -380,5 +1057,6 @@ class Generator:
 
         self.generation_jump_candidates: Dict[GenerationJumpType, Callable[[List[Individual]], None]] = {
             GenerationJumpType.TRADITIONAL: self.new_generation_trad,
-            GenerationJumpType.YOUNG_BIAS: self.new_generation_young_bias
+            GenerationJumpType.YOUNG_BIAS: self.new_generation_young_bias,
+            GenerationJumpType.STEADY_STATE: self.new_generation_steady_state
         }
@@ -1,142 +1,110 @@
 import cairo
-from typing import Tuple, List
+import numpy as np
+from typing import Sequence, Tuple
 from abc import ABC, abstractmethod
-from src.utils import clampint, rand_vertex, randfloat, randint, clamp
 
 class Shape(ABC):
-    def __init__(self, color: Tuple[float,float,float,float]) -> None:
-        self.color = color
-        self._multiplier = 1
-
-
-    @abstractmethod
-    def draw(self, ctx: cairo.Context):
-        pass
+    """
+    A kind of shape. The genes themselves aren't objects but rows of two NumPy arrays
+    shared by a whole batch of individuals:
+    - `vertices`: `int32` array of shape `(..., shape_count, vertex_count, 2)`.
+    - `colors`: `float64` array of shape `(..., shape_count, 4)` holding RGBA in [0, 1].
+    """
+    vertex_count: int
 
     @staticmethod
     @abstractmethod
-    # Return type should be of the same class (Shape or its subclass)
-    def random(img_size: Tuple[int,int]) -> "Shape":
+    def draw(ctx: cairo.Context, vertices: Sequence[Sequence[int]], color: Sequence[float]):
         pass
 
-    # @staticmethod
-    # def random_color() -> Tuple[float,float,float,float]:
-    #     return (randfloat(0, 1), randfloat(0, 1), randfloat(0, 1), randfloat(0, 1))
-
-    def _set_multiplier(self, val: int):
-        self._multiplier = val
-
+    @classmethod
     @abstractmethod
-    def mutate(self, img_size: Tuple[int, int]):
+    def random(cls, rng: np.random.Generator, count: Tuple[int, ...], img_size: Tuple[int,int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Create `count` (a NumPy shape, e.g. `(population, shape_count)`) random genes.
+
+        @returns `(vertices, colors)`
+        """
         pass
 
+    @classmethod
     @abstractmethod
-    def clone(self) -> "Shape":
+    def mutate(cls, rng: np.random.Generator, vertices: np.ndarray, colors: np.ndarray, mask: np.ndarray, img_size: Tuple[int, int]):
         """
-        Create a deep copy of this shape.
+        Mutate in place the genes selected by the boolean `mask`, which has the shape of
+        `colors` without its last axis.
         """
         pass
 
 class Polygon(Shape):
-    def __init__(self, color: Tuple[float,float,float,float], vertices: Tuple[Tuple[int,int], ...]) -> None:
-        super().__init__(color)
-        self.vertices = vertices
-
-    def draw(self, ctx: cairo.Context):
-        ctx.set_source_rgba(*self.color)
+    @staticmethod
+    def draw(ctx: cairo.Context, vertices: Sequence[Sequence[int]], color: Sequence[float]):
+        ctx.set_source_rgba(*color)
 
-        ctx.move_to(*self.vertices[0])
-        for point in self.vertices[1:]:
+        ctx.move_to(*vertices[0])
+        for point in vertices[1:]:
             ctx.line_to(*point)
 
         ctx.close_path()
         ctx.fill()
 
-    def mutate(self, img_size: Tuple[int, int]):
-        roulette = randint(1, 100)
-        if roulette <= 30: # 30% of changing color
-            delta = 20/255
-            self.color = (
-                clamp(0, self.color[0] + randfloat(-delta, delta), 1),
-                clamp(0, self.color[1] + randfloat(-delta, delta), 1),
-                clamp(0, self.color[2] + randfloat(-delta, delta), 1),
-                self.color[3]
-            )
-        elif roulette <= 40: # 10% of changing to a base color
-            self.color = (*Color.get_random_fixed_color(), self.color[3])
-        elif roulette <= 50: # 10% of changing transparency
-            self.color = (self.color[0], self.color[1], self.color[2], Color.get_random_fixed_transparency())
-        elif roulette <= 80: # 30% of changing position
-            delta = ((img_size[0] + img_size[1])//(2*10)) * self._multiplier
-
-            new_vertices = tuple(
-                (
-                    clampint(0, v[0] + randint(-delta, delta), img_size[0]),
-                    clampint(0, v[1] + randint(-delta, delta), img_size[1]),
-                )
-                for v in self.vertices
-            )
-            self.vertices = new_vertices
-        else: # 20% of changing position
-            (x, y) = rand_vertex(img_size)
-            new_vertices = tuple((
-                clampint(0, v[0]//2 + x, img_size[0]),
-                clampint(0, v[1]//2 + y, img_size[1]),
-            ) for v in self.vertices)
-            self.vertices = new_vertices
-
-    def __str__(self) -> str:
-        return f"{{c: {self.color}, v: {self.vertices}}}"
+    @classmethod
+    def mutate(cls, rng: np.random.Generator, vertices: np.ndarray, colors: np.ndarray, mask: np.ndarray, img_size: Tuple[int, int]):
+        roulette = rng.integers(1, 100, size=mask.shape)
+        lims = np.array(img_size)
+
+        change_color = mask & (roulette <= 30) # 30% of changing color
+        delta = 20/255
+        colors[change_color, :3] = np.clip(
+            colors[change_color, :3] + rng.uniform(-delta, delta, (np.count_nonzero(change_color), 3)), 0, 1
+        )
+
+        to_base_color = mask & (roulette > 30) & (roulette <= 40) # 10% of changing to a base color
+        colors[to_base_color, :3] = Color.get_random_fixed_colors(rng, np.count_nonzero(to_base_color))
+
+        change_transparency = mask & (roulette > 40) & (roulette <= 50) # 10% of changing transparency
+        colors[change_transparency, 3] = Color.get_random_fixed_transparencies(rng, np.count_nonzero(change_transparency))
+
+        move = mask & (roulette > 50) & (roulette <= 80) # 30% of changing position
+        delta = max(1, (img_size[0] + img_size[1])//(2*10))
+        shift = rng.integers(-delta, delta, (np.count_nonzero(move), cls.vertex_count, 2))
+        vertices[move] = np.clip(vertices[move] + shift, 0, lims)
+
+        jump = mask & (roulette > 80) # 20% of changing position
+        anchor = rng.integers(0, lims, (np.count_nonzero(jump), 1, 2))
+        vertices[jump] = np.clip(vertices[jump]//2 + anchor, 0, lims)
 
 class Triangle(Polygon):
-    def __init__(self, color: Tuple[float,float,float,float], vertices: Tuple[Tuple[int,int], Tuple[int,int], Tuple[int,int]]) -> None:
-        super().__init__(color, vertices)
-        self.vertices = vertices
+    vertex_count = 3
 
-    @staticmethod
-    def random(img_size: Tuple[int,int]) -> "Triangle":
-        color = (*Color.get_random_fixed_color(), Color.get_full_transparency())
-        # size_lim = 100
-        # delta = rand_vertex(img_size)
-        # x1, y1 = sum_vec(rand_vertex((size_lim, size_lim)), delta)
-        # x2, y2 = sum_vec(rand_vertex((size_lim, size_lim)), delta)
-        # x3, y3 = sum_vec(rand_vertex((size_lim, size_lim)), delta)
-
-        x1, y1 = rand_vertex(img_size)
-        x2, y2 = rand_vertex(img_size)
-        x3, y3 = rand_vertex(img_size)
-        
-        return Triangle(color, ((x1, y1), (x2, y2), (x3, y3)))
-
-    def clone(self) -> "Triangle":
-        return Triangle(self.color, self.vertices)
+    @classmethod
+    def random(cls, rng: np.random.Generator, count: Tuple[int, ...], img_size: Tuple[int,int]) -> Tuple[np.ndarray, np.ndarray]:
+        colors = np.empty((*count, 4))
+        colors[..., :3] = Color.get_random_fixed_colors(rng, count)
+        colors[..., 3] = Color.get_full_transparency()
+
+        vertices = rng.integers(0, img_size, (*count, cls.vertex_count, 2), dtype=np.int32)
+        return vertices, colors
 
 class Square(Polygon):
-    def __init__(
-        self,
-        color: Tuple[float,float,float,float],
-        vertices: Tuple[
-            Tuple[int,int],
-            Tuple[int,int],
-            Tuple[int,int],
-            Tuple[int,int],
-        ]
-    ) -> None:
-        super().__init__(color, vertices)
-        self.vertices = vertices
+    vertex_count = 4
 
-    @staticmethod
-    def random(img_size: Tuple[int,int]) -> "Square":
-        color = (*Color.get_random_fixed_color(), Color.get_full_transparency())
-        x1, y1 = randint(0, img_size[0]), randint(0, img_size[1])
-        x3, y3 = randint(0, img_size[0]), randint(0, img_size[1])
-        x2, y2 = (x3, y1)
-        x4, y4 = (x1, y3)
-        
-        return Square(color, ((x1, y1), (x2, y2), (x3, y3), (x4, y4)))
-
-    def clone(self) -> "Square":
-        return Square(self.color, self.vertices)
+    @classmethod
+    def random(cls, rng: np.random.Generator, count: Tuple[int, ...], img_size: Tuple[int,int]) -> Tuple[np.ndarray, np.ndarray]:
+        colors = np.empty((*count, 4))
+        colors[..., :3] = Color.get_random_fixed_colors(rng, count)
+        colors[..., 3] = Color.get_full_transparency()
+
+        # Opposite corners (x1, y1) and (x3, y3), the other two are (x3, y1) and (x1, y3).
+        corners = rng.integers(0, img_size, (*count, 2, 2), dtype=np.int32)
+        vertices = np.empty((*count, cls.vertex_count, 2), dtype=np.int32)
+        vertices[..., 0, :] = corners[..., 0, :]
+        vertices[..., 1, 0] = corners[..., 1, 0]
+        vertices[..., 1, 1] = corners[..., 0, 1]
+        vertices[..., 2, :] = corners[..., 1, :]
+        vertices[..., 3, 0] = corners[..., 0, 0]
+        vertices[..., 3, 1] = corners[..., 1, 1]
+        return vertices, colors
 
 # class Ellipse(Shape):
 #     def __init__(self, color: Tuple[float,float,float,float], center: Tuple[int, int], radii: Tuple[int, int], angle: float = 0) -> None:
@@ -176,7 +144,7 @@ class Square(Polygon):
 #         return Ellipse(self.color, self.center, self.radii, self.angle)
 
 class Color:
-    _fixed_colors: List[Tuple[float, float, float]] = [
+    _fixed_colors: np.ndarray = np.array([
         (1.0, 0.0, 0.0),         # Red  
         (0.0, 1.0, 0.0),         # Green  
         (0.0, 0.0, 1.0),         # Blue  
@@ -197,20 +165,20 @@ class Color:
         (0.941, 0.902, 0.549),   # Khaki  
         (0.753, 0.753, 0.753),   # Silver  
         (1.0, 0.843, 0.0),       # Golden  
-    ]
+    ])
 
-    _fixed_transparency: List[float] = [0.5, 0.75, 1]
+    _fixed_transparency: np.ndarray = np.array([0.5, 0.75, 1])
 
     @classmethod
-    def get_random_fixed_color(cls) -> Tuple[float, float, float]:
-        color_idx = randint(0, len(cls._fixed_colors))
-        R, G, B = cls._fixed_colors[color_idx]
-        return (R, G, B)
+    def get_random_fixed_colors(cls, rng: np.random.Generator, count) -> np.ndarray:
+        """
+        @returns `np.ndarray` of shape `(*count, 3)` with random RGB colors from the fixed palette.
+        """
+        return cls._fixed_colors[rng.integers(0, len(cls._fixed_colors), count)]
     
     @classmethod
-    def get_random_fixed_transparency(cls) -> float:
-        transparency_idx = randint(0, len(cls._fixed_transparency))
-        return cls._fixed_transparency[transparency_idx]
+    def get_random_fixed_transparencies(cls, rng: np.random.Generator, count) -> np.ndarray:
+        return cls._fixed_transparency[rng.integers(0, len(cls._fixed_transparency), count)]
     
     @classmethod
     def get_full_transparency(cls) -> float:
@@ -1,23 +1,62 @@
 from PIL import Image
+import os
+import random
 import time
-from typing import Dict, Tuple, List, TypedDict
+from enum import Enum
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple, List, TypedDict
+import numpy as np
 
-from src.generator import Generator, SelectionType, CrossoverType, MutationType, GenerationJumpType, ShapeType
+from src.generator import Generator, SelectionType, CrossoverType, MutationType, GenerationJumpType, ShapeType, LabBackend
+from src.checkpoint import load_checkpoint, random_state, save_checkpoint, set_random_state
+from src.history import HistoryWriter
+from src.output_writer import OutputWriter, QueueFullPolicy
+from src.profiling import PHASES, PhaseStats
+from src.rasterizer import RenderBackend
+from src.islands import Topology, run_islands
+from src.shared_arrays import SharedArrays
 import json
 
 from src.individual import Individual
 
+class StagnationAction(Enum):
+    STOP = 1
+    REHEAT = 2
+    RESEED = 3
+
+    @classmethod
+    def from_string(cls, name: str):
+        return cls[name.upper()]
+
 class GenerationData(TypedDict):
     gen: int
     fittest: Individual
-    score: float
+    time: float
+    # Downscale factor of the reference the generation was evolved against, 1 is full resolution.
+    scale: int
+    # Fitness evaluations of the generation, one per new individual (the first one includes the initial
+    # population). Reseeded individuals and immigrants count in the generation they arrived in.
+    evaluations: int
+    # Time and calls of every phase of the generation, empty unless profiling.
+    phases: Dict[str, PhaseStats]
+
+class RunSummary(TypedDict):
+    # Fittest generation at full resolution, `None` if the run never got there.
+    best: Optional[GenerationData]
+    # Last generation evolved, `None` if there wasn't any.
+    last: Optional[GenerationData]
 
 class ImageReconstructionGeneticAlgorithm:
-    def __init__(self, og_img: Image.Image, shape_count: int):
+    def __init__(self, og_img: Image.Image, shape_count: int, config_overrides: Optional[Dict[str, Any]] = None):
+        """
+        @param `config_overrides`: Options that replace the ones in `configs/config.json`.
+        """
         self._og_img = og_img
         self._shape_count = shape_count
         with open("./configs/config.json", "r") as f:
             config = json.load(f)
+        self._config_overrides = config_overrides or {}
+        config.update(self._config_overrides)
         self._selection = SelectionType.from_string(config["selection_algorithm"])
         self._crossover = CrossoverType.from_string(config["crossover_algorithm"])
         self._mutation = MutationType.from_string(config["mutation_algorithm"])
@@ -27,32 +66,393 @@ class ImageReconstructionGeneticAlgorithm:
         self._max_gen_count = config["max_gen_count"]
         self._min_fitness_goal = config["min_fitness_goal"]
         self._use_delta_D = config["use_delta_D"]
+        self._evaluation_workers = config["evaluation_workers"]
+        self._seed = config["seed"]
+        self._render_checkpoint_interval = config["render_checkpoint_interval"]
+        self._delta_fitness = config["delta_fitness"]
+        self._fitness_cache_size = config["fitness_cache_size"]
+        self._lab_backend = LabBackend.from_string(config["lab_backend"])
+        self._pyramid_levels = config["pyramid_levels"]
+        self._pyramid_level_max_gens = config["pyramid_level_max_gens"]
+        self._pyramid_plateau_window = config["pyramid_plateau_window"]
+        self._pyramid_plateau_delta = config["pyramid_plateau_delta"]
+        self._island_count = config["island_count"]
+        self._island_topology = Topology.from_string(config["island_topology"])
+        self._island_migration_interval = config["island_migration_interval"]
+        self._island_migrant_count = config["island_migrant_count"]
+        self._island_overrides = config["island_overrides"]
+        self._checkpoint_interval = config["checkpoint_interval"]
+        self._checkpoint_path = config["checkpoint_path"]
+        self._history_path = config["history_path"]
+        self._snapshot_interval = config["snapshot_interval"]
+        self._snapshot_dir = config["snapshot_dir"]
+        self._profile = config["profile"]
+        self._render_backend = RenderBackend.from_string(config["render_backend"])
+        self._fitness_tiles = config["fitness_tiles"]
+        self._output_queue_size = config["output_queue_size"]
+        self._output_queue_policy = QueueFullPolicy.from_string(config["output_queue_policy"])
+        self._stagnation_window = config["stagnation_window"]
+        self._stagnation_delta = config["stagnation_delta"]
+        self._stagnation_min_diversity = config["stagnation_min_diversity"]
+        self._stagnation_action = StagnationAction.from_string(config["stagnation_action"])
+        self._stagnation_reseed_fraction = config["stagnation_reseed_fraction"]
+        self._log_prefix = ""
+        # `Generator.reference_arrays` of `og_img` to use instead of computing them, see `_run_islands`.
+        self._reference: Optional[Dict[str, np.ndarray]] = None
        
-    def run(self) -> Tuple[List[GenerationData], float]:
+    def run(
+        self, on_generation: Optional[Callable[[Generator, int], None]] = None, resume_from: Optional[str] = None
+    ) -> Tuple[RunSummary, float]:
+        """
+        Every generation is written to `history_path` as it's evolved, only the fittest individual is kept.
+        History records, snapshots and progress logs are written on a background thread, see `OutputWriter`.
+
+        @param `on_generation`: Called after every new generation with the generator and generation number.
+        @param `resume_from`: Path of a checkpoint saved by a previous run (every `checkpoint_interval`
+        generations) to continue from. The config must be the same one. The history continues from the checkpoint.
+        @returns The summary of the run and its elapsed time.
+        """
+        if not 0 <= self._stagnation_reseed_fraction <= 1:
+            raise ValueError("stagnation_reseed_fraction must be between 0 and 1.")
+        if self._island_count > 1:
+            if resume_from is not None:
+                raise ValueError("Resuming from a checkpoint isn't supported with islands.")
+            return self._run_islands()
+
+        resumed = load_checkpoint(resume_from) if resume_from is not None else None
+        if self._seed is not None:
+            random.seed(self._seed)
         gen = Generator(
-            self._og_img, self._shape_count, ShapeType.TRIANGLE, self._population_amount,
-            self._selection, self._crossover, self._mutation, self._gen_jump, self._use_delta_D
+            self._pyramid_image(int(resumed["level"]) if resumed else 0), self._shape_count, ShapeType.TRIANGLE, self._population_amount,
+            self._selection, self._crossover, self._mutation, self._gen_jump, self._use_delta_D,
+            self._evaluation_workers, self._render_checkpoint_interval, self._delta_fitness,
+            self._fitness_cache_size, self._lab_backend, resumed, self._profile, self._render_backend,
+            self._fitness_tiles, self._reference
+        )
+        if resumed is not None:
+            set_random_state(resumed)
+        try:
+            resume_offset = int(resumed["history_offset"]) if resumed is not None and "history_offset" in resumed else None
+            with HistoryWriter(self._history_path, resume_offset) as history, \
+                    OutputWriter(self._output_queue_size, self._output_queue_policy) as output:
+                return self._evolve(gen, history, output, on_generation, resumed)
+        finally:
+            gen.close()
+
+    def _island_config(self, index: int) -> Dict[str, Any]:
+        """
+        Config of one island: this run's current settings (builder setters included), minus the island and
+        pyramid options and any output file the islands would share, with the island's entry of
+        `island_overrides` (cycled if there are fewer entries than islands) on top. Overrides can't change the
+        fitness function, the islands' scores wouldn't be comparable.
+        """
+        config = dict(self._config_overrides)
+        config.update({
+            "selection_algorithm": self._selection.name.lower(),
+            "crossover_algorithm": self._crossover.name.lower(),
+            "mutation_algorithm": self._mutation.name.lower(),
+            "gen_jump_algorithm": self._gen_jump.name.lower(),
+            "population_amount": self._population_amount,
+            "generated_child_amount": self._generated_child_amount,
+            "max_gen_count": self._max_gen_count,
+            "min_fitness_goal": self._min_fitness_goal,
+            "use_delta_D": self._use_delta_D,
+            "evaluation_workers": self._evaluation_workers,
+            "render_checkpoint_interval": self._render_checkpoint_interval,
+            "delta_fitness": self._delta_fitness,
+            "fitness_cache_size": self._fitness_cache_size,
+            "lab_backend": self._lab_backend.name.lower(),
+            "profile": self._profile,
+            "render_backend": self._render_backend.name.lower(),
+            "fitness_tiles": self._fitness_tiles,
+            "output_queue_size": self._output_queue_size,
+            "output_queue_policy": self._output_queue_policy.name.lower(),
+            "stagnation_window": self._stagnation_window,
+            "stagnation_delta": self._stagnation_delta,
+            "stagnation_min_diversity": self._stagnation_min_diversity,
+            "stagnation_action": self._stagnation_action.name.lower(),
+            "stagnation_reseed_fraction": self._stagnation_reseed_fraction,
+            "seed": self._seed,
+        })
+        config.update({
+            "island_count": 0, "pyramid_levels": [], "checkpoint_interval": 0,
+            "history_path": None, "snapshot_interval": 0
+        })
+        if self._seed is not None:
+            config["seed"] = self._seed + index
+        if self._island_overrides:
+            config.update(self._island_overrides[index % len(self._island_overrides)])
+        # Islands are compared by the fitness they report, it must mean the same on all of them.
+        if config["use_delta_D"] != self._use_delta_D or (
+            self._use_delta_D and LabBackend.from_string(config["lab_backend"]) != self._lab_backend
+        ):
+            raise ValueError(f"island_overrides can't change the fitness function (use_delta_D, lab_backend), island {index} does.")
+        return config
+
+    def _run_islands(self) -> Tuple[RunSummary, float]:
+        """
+        Evolve `island_count` populations in their own processes, exchanging their
+        `island_migrant_count` fittest individuals every `island_migration_interval` generations.
+        The history gets one record per report of an island.
+
+        @returns Like `run`, `best` holds the best individual found by any island.
+        """
+        summary: RunSummary = {"best": None, "last": None}
+        island_best: Dict[int, float] = {}
+        global_best: Optional[Individual] = None
+        start_time = time.time()
+        last_report_time = start_time
+
+        configs = [self._island_config(i) for i in range(self._island_count)]
+        # The reference (and its Lab version for the islands that need it) exists once, in shared memory,
+        # instead of once per island process.
+        lab_backends = [LabBackend.from_string(config["lab_backend"]) for config in configs if config["use_delta_D"]]
+        arrays = Generator.reference_arrays(self._og_img, lab_backends)
+        arrays["rgba"] = np.asarray(self._og_img.convert("RGBA"))
+        reference = SharedArrays.create(arrays)
+        del arrays
+
+        reports = run_islands(
+            reference.handle, self._shape_count, configs,
+            self._island_topology, self._island_migration_interval, self._island_migrant_count
         )
+        with reference, HistoryWriter(self._history_path) as history:
+            for report in reports:
+                if report["error"] is not None:
+                    print(f"island {report['island']} failed: {report['error']}")
+                    continue
+                island_best[report["island"]] = report["fitness"]
+                if global_best is None or report["fitness"] > global_best.fitness:
+                    global_best = Individual(report["vertices"], report["colors"], self._og_img.size)
+                    global_best.set_fitness(report["fitness"])
+                    summary["best"] = {"gen": report["gen"], "fittest": global_best, "time": 0.0, "scale": 1, "evaluations": 0, "phases": {}}
+                if report["done"]:
+                    print(f"island {report['island']} finished at gen {report['gen']:03}: {report['fitness']}")
+                report_time = time.time() - last_report_time
+                summary["last"] = {"gen": report["gen"], "fittest": global_best, "time": report_time, "scale": 1, "evaluations": 0, "phases": {}}
+                history.write({
+                    "gen": report["gen"], "island": report["island"], "best": report["fitness"],
+                    "global_best": global_best.fitness, "time": report_time
+                })
+                last_report_time = time.time()
+
+        for island, fitness in sorted(island_best.items()):
+            print(f"island {island} best: {fitness}")
+        if global_best is not None:
+            print(f"global best: {global_best.fitness}")
+        return (summary, time.time() - start_time)
+
+    def _pyramid_scales(self) -> List[int]:
+        """
+        @returns `List[int]`: Downscale factor of every level, from the coarsest to the full resolution one.
+        """
+        return sorted((scale for scale in self._pyramid_levels if scale > 1), reverse=True) + [1]
+
+    def _pyramid_image(self, level: int) -> Image.Image:
+        scale = self._pyramid_scales()[level]
+        if scale == 1:
+            return self._og_img
+        (w, h) = self._og_img.size
+        return self._og_img.resize((max(1, w // scale), max(1, h // scale)), Image.Resampling.BOX)
+
+    def _level_finished(self, level_gens: int, level_fitness: List[float]) -> bool:
+        """
+        A coarse level ends after `pyramid_level_max_gens` generations, or earlier if the fittest improved
+        less than `pyramid_plateau_delta` over the last `pyramid_plateau_window` generations.
+        """
+        if level_gens >= self._pyramid_level_max_gens:
+            return True
+        window = self._pyramid_plateau_window
+        return (
+            window > 0 and len(level_fitness) > window
+            and level_fitness[-1] - level_fitness[-1 - window] < self._pyramid_plateau_delta
+        )
+
+    def _evolve(
+        self,
+        gen: Generator,
+        history: HistoryWriter,
+        output: OutputWriter,
+        on_generation: Optional[Callable[[Generator, int], None]] = None,
+        resumed: Optional[Dict[str, np.ndarray]] = None
+    ) -> Tuple[RunSummary, float]:
         last_fitness_check = 0
         gen_count = 0
-        fitness_evolution = []
+        summary: RunSummary = {"best": None, "last": None}
+
+        scales = self._pyramid_scales()
+        level = 0
+        level_fitness: List[float] = []
+        # Fittest of every full resolution generation since the last stagnation action.
+        stagnation_fitness: List[float] = []
+        monitor_stagnation = self._stagnation_window > 0 or self._stagnation_min_diversity > 0
+        stopped = False
+
+        if resumed is not None:
+            gen_count = int(resumed["gen_count"])
+            last_fitness_check = float(resumed["last_fitness_check"])
+            level = int(resumed["level"])
+            level_fitness = resumed["level_fitness"].tolist()
+            if "stagnation_fitness" in resumed:
+                stagnation_fitness = resumed["stagnation_fitness"].tolist()
+            if "best_fitness" in resumed:
+                # Individuals from before the checkpoint are gone, keep the best one around.
+                best = Individual(resumed["best_vertices"], resumed["best_colors"], self._og_img.size)
+                best.set_fitness(float(resumed["best_fitness"]))
+                summary["best"] = {"gen": int(resumed["best_gen"]), "fittest": best, "time": 0.0, "scale": 1, "evaluations": 0, "phases": {}}
 
         start_time = time.time()
 
-        while last_fitness_check <= self._min_fitness_goal and gen_count <= self._max_gen_count:
+        # Fitness goal only counts at full resolution, coarse levels are easier to match.
+        while not stopped and (level < len(scales) - 1 or last_fitness_check <= self._min_fitness_goal) and gen_count <= self._max_gen_count:
+            if level < len(scales) - 1 and self._level_finished(len(level_fitness), level_fitness):
+                level += 1
+                level_fitness = []
+                gen.change_reference(self._pyramid_image(level))
+                output.submit(partial(print, f"{self._log_prefix}gen {gen_count:03}: continuing at 1/{scales[level]} scale"))
+
             gen_start_time = time.time()
             fittest = gen.fittest
             if gen_count % 100 == 0:
-                print(f"gen {gen_count:03}: {fittest.fitness}")
+                output.submit(partial(print, f"{self._log_prefix}gen {gen_count:03}: {fittest.fitness}", flush=True))
+            if self._snapshot_interval > 0 and gen_count % self._snapshot_interval == 0:
+                # The Pillow copy is taken here, the individual's pixels may be released before it's encoded.
+                output.submit(partial(self._save_snapshot, fittest.img, gen_count), droppable=True)
+            mean, std = gen.fitness_stats()
+            diversity = gen.diversity() if monitor_stagnation else None
             last_fitness_check = fittest.fitness
+            level_fitness.append(fittest.fitness)
             gen.new_generation(self._generated_child_amount)
-            fitness_evolution.append({
+
+            if monitor_stagnation and level == len(scales) - 1:
+                stagnation_fitness.append(fittest.fitness)
+                if self._stagnated(stagnation_fitness, diversity):
+                    message = f"{self._log_prefix}gen {gen_count:03}: stagnated (diversity {diversity:.4f}), "
+                    if self._stagnation_action == StagnationAction.STOP:
+                        stopped = True
+                        message += "stopping"
+                    elif self._stagnation_action == StagnationAction.REHEAT:
+                        gen.reheat()
+                        message += f"mutation probability back to {gen.mutation_prob}"
+                    else:
+                        count = min(max(1, round(self._stagnation_reseed_fraction * self._population_amount)), len(gen.individuals))
+                        gen.reseed(count)
+                        message += f"{count} individuals replaced with random ones"
+                    output.submit(partial(print, message))
+                    stagnation_fitness = []
+
+            if on_generation is not None:
+                on_generation(gen, gen_count)
+
+            # After the stagnation action and `on_generation`, so the individuals they score (reseeded ones,
+            # immigrants) count in this generation.
+            generation: GenerationData = {
                 "gen": gen_count,
                 "fittest": fittest,
-                "time": time.time() - gen_start_time
-            })
+                "time": time.time() - gen_start_time,
+                "scale": scales[level],
+                "evaluations": gen.take_evaluations(),
+                "phases": gen.profiler.take()
+            }
+            record = {
+                "gen": gen_count,
+                "best": fittest.fitness,
+                "mean": mean,
+                "std": std,
+                "time": generation["time"],
+                "scale": scales[level],
+                "evaluations": generation["evaluations"]
+            }
+            if diversity is not None:
+                record["diversity"] = diversity
+            if self._profile:
+                for phase in PHASES:
+                    stats = generation["phases"].get(phase, {"time": 0.0, "count": 0})
+                    record[f"{phase}_time"] = stats["time"]
+                    record[f"{phase}_count"] = stats["count"]
+            output.submit(partial(history.write, record))
+            summary["last"] = generation
+            # Generations evolved on a downscaled reference (pyramid mode) aren't comparable.
+            if generation["scale"] == 1 and (summary["best"] is None or fittest.fitness > summary["best"]["fittest"].fitness):
+                summary["best"] = generation
+
             gen_count += 1
-        return (fitness_evolution, time.time() - start_time)
+            if self._checkpoint_interval > 0 and gen_count % self._checkpoint_interval == 0:
+                # The history offset must include every record written so far.
+                output.flush()
+                self._save_checkpoint(
+                    gen, gen_count, last_fitness_check, level, level_fitness, stagnation_fitness, summary["best"], history
+                )
+        output.flush()
+        if output.dropped > 0:
+            print(f"{self._log_prefix}Output queue full: {output.dropped} snapshots dropped")
+        print(f"{self._log_prefix}Fitness evaluations: {gen.evaluations}")
+        if gen.fitness_cache_size > 0:
+            print(f"{self._log_prefix}Fitness cache: {gen.cache_hits} hits, {gen.cache_misses} misses")
+        if self._profile:
+            self._print_profile(gen.profiler.totals, gen_count)
+            print(f"{self._log_prefix}Surface pool: {gen.surface_pool.allocations} canvases allocated")
+        return (summary, time.time() - start_time)
+
+    def _print_profile(self, totals: Dict[str, PhaseStats], gen_count: int):
+        total_time = sum(stats["time"] for stats in totals.values()) or 1.0
+        print(f"{self._log_prefix}{'phase':<12} {'time (s)':>10} {'%':>6} {'calls':>9} {'calls/gen':>10}")
+        for phase in PHASES:
+            if phase not in totals:
+                continue
+            stats = totals[phase]
+            print(
+                f"{self._log_prefix}{phase:<12} {stats['time']:10.3f} {100 * stats['time'] / total_time:6.1f} "
+                f"{stats['count']:9} {stats['count'] / max(gen_count, 1):10.1f}"
+            )
+
+    def _stagnated(self, fitness: List[float], diversity: float) -> bool:
+        """
+        The population stagnated when the fittest improved less than `stagnation_delta` over the last
+        `stagnation_window` generations, or the genome diversity fell under `stagnation_min_diversity`.
+        Nothing is checked until `fitness` (reset after every action) has more than a window of generations.
+        """
+        window = self._stagnation_window
+        if len(fitness) <= window:
+            return False
+        return (
+            (window > 0 and fitness[-1] - fitness[-1 - window] < self._stagnation_delta)
+            or diversity < self._stagnation_min_diversity
+        )
+
+    def _save_snapshot(self, img: Image.Image, gen_count: int):
+        os.makedirs(self._snapshot_dir, exist_ok=True)
+        img.save(os.path.join(self._snapshot_dir, f"gen_{gen_count:05}.png"))
+
+    def _save_checkpoint(
+        self,
+        gen: Generator,
+        gen_count: int,
+        last_fitness_check: float,
+        level: int,
+        level_fitness: List[float],
+        stagnation_fitness: List[float],
+        best: Optional[GenerationData],
+        history: HistoryWriter
+    ):
+        arrays = gen.state()
+        arrays.update(random_state())
+        arrays.update({
+            "gen_count": np.array(gen_count),
+            "last_fitness_check": np.array(last_fitness_check),
+            "level": np.array(level),
+            "level_fitness": np.array(level_fitness, dtype=np.float64),
+            "stagnation_fitness": np.array(stagnation_fitness, dtype=np.float64),
+            "history_offset": np.array(history.offset),
+        })
+        if best is not None:
+            arrays.update({
+                "best_gen": np.array(best["gen"]),
+                "best_fitness": np.array(best["fittest"].fitness),
+                "best_vertices": best["fittest"].vertices,
+                "best_colors": best["fittest"].colors,
+            })
+        save_checkpoint(self._checkpoint_path, arrays)
 
     def selection(self, selection: SelectionType):
         self._selection = selection
@@ -89,3 +489,88 @@ class ImageReconstructionGeneticAlgorithm:
     def use_delta_D(self, yes: bool = True):
         self._use_delta_D = yes
         return self
+
+    def evaluation_workers(self, evaluation_workers: int):
+        self._evaluation_workers = evaluation_workers
+        return self
+
+    def seed(self, seed: Optional[int]):
+        self._seed = seed
+        return self
+
+    def render_checkpoint_interval(self, render_checkpoint_interval: int):
+        self._render_checkpoint_interval = render_checkpoint_interval
+        return self
+
+    def delta_fitness(self, yes: bool = True):
+        self._delta_fitness = yes
+        return self
+
+    def fitness_cache_size(self, fitness_cache_size: int):
+        self._fitness_cache_size = fitness_cache_size
+        return self
+
+    def lab_backend(self, lab_backend: LabBackend):
+        self._lab_backend = lab_backend
+        return self
+
+    def pyramid_levels(self, pyramid_levels: List[int]):
+        self._pyramid_levels = pyramid_levels
+        return self
+
+    def pyramid_level_max_gens(self, pyramid_level_max_gens: int):
+        self._pyramid_level_max_gens = pyramid_level_max_gens
+        return self
+
+    def islands(self, count: int, topology: Topology = Topology.RING, migration_interval: int = 50, migrant_count: int = 2):
+        self._island_count = count
+        self._island_topology = topology
+        self._island_migration_interval = migration_interval
+        self._island_migrant_count = migrant_count
+        return self
+
+    def checkpoint(self, interval: int, path: str):
+        self._checkpoint_interval = interval
+        self._checkpoint_path = path
+        return self
+
+    def pyramid_plateau(self, window: int, delta: float):
+        self._pyramid_plateau_window = window
+        self._pyramid_plateau_delta = delta
+        return self
+
+    def history_path(self, history_path: Optional[str]):
+        self._history_path = history_path
+        return self
+
+    def snapshots(self, interval: int, directory: str):
+        self._snapshot_interval = interval
+        self._snapshot_dir = directory
+        return self
+
+    def profile(self, yes: bool = True):
+        self._profile = yes
+        return self
+
+    def render_backend(self, render_backend: RenderBackend):
+        self._render_backend = render_backend
+        return self
+
+    def fitness_tiles(self, tiles: int):
+        self._fitness_tiles = tiles
+        return self
+
+    def stagnation(
+        self, window: int, delta: float, action: StagnationAction, min_diversity: float = 0.0, reseed_fraction: float = 0.5
+    ):
+        self._stagnation_window = window
+        self._stagnation_delta = delta
+        self._stagnation_action = action
+        self._stagnation_min_diversity = min_diversity
+        self._stagnation_reseed_fraction = reseed_fraction
+        return self
+
+    def output_queue(self, size: int, policy: QueueFullPolicy = QueueFullPolicy.BLOCK):
+        self._output_queue_size = size
+        self._output_queue_policy = policy
+        return self
@@ -0,0 +1,68 @@
+import csv
+import json
+import os
+from typing import Any, Dict, Optional, TextIO
+
+class HistoryWriter:
+    """
+    Appends one record per generation to a file as the run goes, instead of keeping them in memory.
+    The format follows the extension: `.csv` writes CSV (columns taken from the first record), anything
+    else writes JSON lines. A `None` path discards the records.
+
+    Records are flushed as they're written, so a crash only loses the generation in progress.
+    """
+    def __init__(self, path: Optional[str], resume_offset: Optional[int] = None) -> None:
+        """
+        @param `resume_offset`: `offset` of the history when a checkpoint was saved. The file is cut back
+        there and continued, so the records written after the checkpoint aren't repeated. `None` starts
+        a new file.
+        """
+        self._file: Optional[TextIO] = None
+        self._csv: Optional[csv.DictWriter] = None
+        self._is_csv = path is not None and path.endswith(".csv")
+        if path is None:
+            self._needs_header = False
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume_offset is not None and os.path.exists(path):
+            self._file = open(path, "r+", newline="")
+            self._file.truncate(resume_offset)
+            self._file.seek(resume_offset)
+        else:
+            self._file = open(path, "w", newline="")
+        # A CSV that already has rows already has its header.
+        self._needs_header = self._file.tell() == 0
+
+    @property
+    def offset(self) -> int:
+        """
+        Size of the history written so far, see `resume_offset`.
+        """
+        return self._file.tell() if self._file is not None else 0
+
+    def write(self, record: Dict[str, Any]):
+        if self._file is None:
+            return
+        if not self._is_csv:
+            self._file.write(json.dumps(record) + "\n")
+        else:
+            if self._csv is None:
+                self._csv = csv.DictWriter(self._file, fieldnames=list(record.keys()))
+                if self._needs_header:
+                    self._csv.writeheader()
+            self._csv.writerow(record)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "HistoryWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
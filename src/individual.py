@@ -1,48 +1,259 @@
 import cairo
-from typing import List, Tuple
+import hashlib
+import itertools
+from typing import List, Optional, Tuple
 from PIL import Image
-from skimage.color import rgb2lab
-from src.genes import Shape
+from src import perceptual
+from src.genes import Polygon
+from src.rasterizer import RenderBackend, render_batch
+from src.surface_pool import SurfacePool
 import numpy as np
 
+def _own(genes: np.ndarray) -> np.ndarray:
+    """
+    @returns `np.ndarray`: `genes`, or a copy of them if they're a view into another array.
+    """
+    return genes if genes.base is None else genes.copy()
+
 class Individual:
-    current_id: int = 1
-    def __init__(self, shapes: List[Shape], img_size: Tuple[int, int], use_delta_D: bool) -> None:
-        self.shapes = shapes
-        self.shape_count = len(shapes)
-        self.id = Individual.current_id
-        Individual.current_id += 1
-
-        width, height = img_size
-        self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
-        ctx = cairo.Context(self.surface)
-
-        for shape in self.shapes:
-            shape.draw(ctx)
-
-        self.img = self._cairo_to_img()
-        # Uncomment the lines below if you want to use the delta_D fitness
-        if use_delta_D:
-            rgb = np.asarray(self.img.convert("RGB")) / 255.0
-            self.lab = rgb2lab(rgb)
+    # `next` on a count is atomic, so ids stay unique when children are built on worker threads.
+    _ids = itertools.count(1)
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        colors: np.ndarray,
+        img_size: Tuple[int, int],
+        render_checkpoint_interval: int = 0,
+        parents: Tuple["Individual", ...] = (),
+        render_backend: RenderBackend = RenderBackend.CAIRO,
+        pool: Optional[SurfacePool] = None
+    ) -> None:
+        """
+        Nothing is drawn here, the surface, the Pillow image and the Lab array are computed the
+        first time they're read and can be dropped again with `release`.
+
+        @param `vertices: np.ndarray`: `(shape_count, vertex_count, 2)` genes. Views (e.g. a row of a batch
+        array) are copied, so one individual doesn't keep the genes of its whole batch alive.
+        @param `colors: np.ndarray`: `(shape_count, 4)` RGBA genes, in draw order like `vertices`.
+        @param `render_checkpoint_interval: int`: If positive, keep a copy of the canvas every that many shapes so
+        children only have to draw from their first shape that differs from this individual. 0 disables it.
+        @param `parents: Tuple[Individual, ...]`: Individuals whose checkpoints may be reused when rendering.
+        @param `render_backend: RenderBackend`: Draw with cairo or with `src.rasterizer`. The latter doesn't
+        have a surface nor checkpoints, only `pixels`.
+        @param `pool: SurfacePool`: Where canvases are borrowed from to render and given back on `release`.
+        """
+        self.vertices = _own(vertices)
+        self.colors = _own(colors)
+        self.shape_count = len(vertices)
+        self.img_size = img_size
+        self.render_checkpoint_interval = render_checkpoint_interval
+        self.parents = parents
+        self.render_backend = render_backend
+        self._pool = pool
+        self.id = next(Individual._ids)
+        self._genome_hash: Optional[bytes] = None
+
+        self._surface: Optional[cairo.ImageSurface] = None
+        # Pixels drawn by the NumPy backend, or given with `set_pixels`.
+        self._frame: Optional[np.ndarray] = None
+        self._img: Optional[Image.Image] = None
+        self._lab: Optional[np.ndarray] = None
+        # `_checkpoints[k]` is the canvas after drawing the first `(k+1)*render_checkpoint_interval` shapes.
+        # They survive `release`, children need them after this individual's own pixels are gone.
+        self._checkpoints: List[bytes] = []
+
+        # Per-pixel error against the reference and its sum, only kept when using the incremental fitness.
+        # Like the checkpoints they survive `release` because children are scored from them.
+        self.error_map: Optional[np.ndarray] = None
+        self.error_total: float = 0
 
         self.fitness = -1
 
+    @property
+    def genome_hash(self) -> bytes:
+        """
+        Digest of the genes (shape order, vertices and colors), equal for individuals that draw the same image.
+        """
+        if self._genome_hash is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(np.ascontiguousarray(self.vertices, dtype=np.int32).tobytes())
+            digest.update(np.ascontiguousarray(self.colors, dtype=np.float64).tobytes())
+            self._genome_hash = digest.digest()
+        return self._genome_hash
+
+    @property
+    def surface(self) -> cairo.ImageSurface:
+        if self._surface is None:
+            self._surface = self._render()
+        return self._surface
+
+    @property
+    def rendered(self) -> bool:
+        """
+        Whether the surface is already drawn, reading `pixels` won't render it.
+        """
+        return self._surface is not None or self._frame is not None
+
+    @property
+    def pixels(self) -> np.ndarray:
+        """
+        `(height, width, 4)` `uint8` view of the surface memory, in cairo's premultiplied BGRA order.
+        No copy is made, it's only valid until `release`.
+        """
+        if self._frame is not None:
+            return self._frame
+        if self.render_backend == RenderBackend.NUMPY:
+            out = [self._pool.frame()] if self._pool is not None and self._pool.img_size == self.img_size else None
+            self._frame = render_batch(self.vertices[None], self.colors[None], self.img_size, out=out)[0]
+            # Don't keep the whole genealogy alive.
+            self.parents = ()
+            return self._frame
+        surface = self.surface
+        return np.ndarray(
+            (surface.get_height(), surface.get_width(), 4), dtype=np.uint8,
+            buffer=surface.get_data(), strides=(surface.get_stride(), 4, 1)
+        )
+
+    @property
+    def img(self) -> Image.Image:
+        """
+        Pillow copy of the surface, only meant for output, fitness works on `pixels`.
+        """
+        if self._img is None:
+            self._img = self._pixels_to_img()
+        return self._img
+
+    @property
+    def lab(self) -> np.ndarray:
+        if self._lab is None:
+            rgb = self.pixels[..., 2::-1] / 255.0
+            self._lab = perceptual.rgb2lab(rgb)
+        return self._lab
+
+    def set_pixels(self, frame: np.ndarray):
+        """
+        Use `frame` (laid out like `pixels`) as this individual's drawing, e.g. one of a batch rendered at once.
+        """
+        self._frame = frame
+        self.parents = ()
 
     def set_fitness(self, fitness: float):
         self.fitness = fitness
 
-    def _cairo_to_img(self) -> Image.Image:
-        buf = self.surface.get_data()
-        width = self.surface.get_width()
-        height = self.surface.get_height()
+    def set_genes(self, vertices: np.ndarray, colors: np.ndarray):
+        """
+        Replace the genes, anything computed from the old ones (pixels and fitness) is discarded.
+        Views are copied like in the constructor.
+        """
+        self.vertices = _own(vertices)
+        self.colors = _own(colors)
+        self.shape_count = len(vertices)
+        self._genome_hash = None
+        self.release()
+        self._checkpoints = []
+        self.error_map = None
+        self.fitness = -1
+
+    def rescale(self, img_size: Tuple[int, int]):
+        """
+        Scale the vertices to a canvas of size `img_size`, like `set_genes` this discards pixels and fitness.
+        """
+        scale = np.array(img_size) / np.array(self.img_size)
+        vertices = np.clip(np.rint(self.vertices * scale), 0, img_size).astype(np.int32)
+        self.img_size = img_size
+        self.set_genes(vertices, self.colors)
+        # Their checkpoints and error maps are for the old size.
+        self.parents = ()
+
+    def release(self):
+        """
+        Drop the rendered surface, image and Lab array, they'll be computed again if needed.
+        Checkpoints are kept. The canvas goes back to the pool, views returned by `pixels` are invalid afterwards.
+        """
+        if self._pool is not None:
+            if self._surface is not None:
+                self._pool.give_back(self._surface)
+            if self._frame is not None:
+                self._pool.give_back(self._frame)
+        self._surface = None
+        self._frame = None
+        self._img = None
+        self._lab = None
+
+    def _render(self) -> cairo.ImageSurface:
+        width, height = self.img_size
+        if self._pool is not None and self._pool.img_size == self.img_size:
+            surface = self._pool.surface()
+        else:
+            surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        start = self._restore_checkpoint(surface)
+        ctx = cairo.Context(surface)
+
+        interval = self.render_checkpoint_interval
+        drawn = start
+        for vertices, color in zip(self.vertices[start:].tolist(), self.colors[start:].tolist()):
+            Polygon.draw(ctx, vertices, color)
+            drawn += 1
+            if interval > 0 and drawn % interval == 0 and drawn < self.shape_count:
+                surface.flush()
+                self._checkpoints.append(bytes(surface.get_data()))
+
+        surface.flush()
+        # Don't keep the whole genealogy alive.
+        self.parents = ()
+        return surface
+
+    def _restore_checkpoint(self, surface: cairo.ImageSurface) -> int:
+        """
+        Copy into `surface` the latest checkpoint that is still valid for this individual's genes,
+        either its own (when rendering again after `release`) or one of a parent's.
+
+        @returns `int`: The amount of shapes already drawn on `surface`.
+        """
+        interval = self.render_checkpoint_interval
+        if interval <= 0:
+            return 0
+
+        if len(self._checkpoints) == 0:
+            for parent in self.parents:
+                if parent.img_size != self.img_size:
+                    continue
+                usable = min(self._shared_prefix(parent) // interval, len(parent._checkpoints))
+                if usable > len(self._checkpoints):
+                    # Shared with the parent, the bytes are never modified.
+                    self._checkpoints = parent._checkpoints[:usable]
+        if len(self._checkpoints) == 0:
+            return 0
+
+        surface.get_data()[:] = self._checkpoints[-1]
+        surface.mark_dirty()
+        return len(self._checkpoints) * interval
+
+    def changed_shapes(self, other: "Individual") -> np.ndarray:
+        """
+        @returns `np.ndarray`: Boolean mask of the draw positions where both individuals (which must have the
+        same amount of shapes) have a different shape.
+        """
+        return np.any(self.vertices != other.vertices, axis=(1, 2)) | np.any(self.colors != other.colors, axis=1)
+
+    def _shared_prefix(self, other: "Individual") -> int:
+        """
+        @returns `int`: How many shapes, from the first one in draw order, are the same in both individuals.
+        """
+        if other.shape_count != self.shape_count:
+            return 0
+        differs = self.changed_shapes(other)
+        return int(np.argmax(differs)) if differs.any() else self.shape_count
+
+    def _pixels_to_img(self) -> Image.Image:
+        pixels = self.pixels
+        height, width = pixels.shape[:2]
 
         # Convert Cairo surface (BGRA) to Pillow image (RGBA)
-        return Image.frombuffer("RGBA", (width, height), buf.tobytes(), "raw", "BGRA", 0, 1)
+        return Image.frombuffer("RGBA", (width, height), pixels.tobytes(), "raw", "BGRA", 0, 1)
     
     def __eq__(self, value: object) -> bool:
         return isinstance(value, Individual) and value.id == self.id
     
     def __hash__(self) -> int:
         return hash(self.id)
-
@@ -0,0 +1,180 @@
+import multiprocessing
+import queue
+from enum import Enum
+from multiprocessing.queues import Queue
+from typing import Any, Dict, Iterator, List, Optional, Set, TypedDict
+import numpy as np
+from PIL import Image
+from src.generator import Generator
+from src.shared_arrays import SharedArrays, SharedArraysHandle
+
+class Topology(Enum):
+    RING = 1
+    FULLY_CONNECTED = 2
+
+    @classmethod
+    def from_string(cls, name: str):
+        return cls[name.upper()]
+
+class IslandReport(TypedDict):
+    island: int
+    gen: int
+    fitness: float
+    # Genes of the island's fittest individual.
+    vertices: np.ndarray
+    colors: np.ndarray
+    # Whether the island finished, it won't send any more reports.
+    done: bool
+    # Why the island stopped if it failed, its genes are `None` and its fitness -1 then.
+    error: Optional[str]
+
+def neighbors(island: int, island_count: int, topology: Topology) -> List[int]:
+    """
+    @returns `List[int]`: The islands that `island` sends its migrants to.
+    """
+    if island_count < 2:
+        return []
+    if topology == Topology.RING:
+        return [(island + 1) % island_count]
+    return [i for i in range(island_count) if i != island]
+
+def run_islands(
+    reference: SharedArraysHandle,
+    shape_count: int,
+    configs: List[Dict[str, Any]],
+    topology: Topology,
+    migration_interval: int,
+    migrant_count: int
+) -> Iterator[IslandReport]:
+    """
+    Run one process per entry of `configs` (overrides for `ImageReconstructionGeneticAlgorithm`) and
+    yield their reports as they arrive: one every migration and a final one per island, also for the
+    islands that fail or whose process dies.
+
+    @param `reference`: Shared `Generator.reference_arrays` of the image, plus the image itself as `"rgba"`.
+    The islands attach to it instead of getting a copy of their own.
+    """
+    island_count = len(configs)
+    # Bounded, migrants that don't fit are dropped instead of slowing down the sender.
+    inboxes: List[Queue] = [multiprocessing.Queue(maxsize=island_count * 2) for _ in range(island_count)]
+    reports: Queue = multiprocessing.Queue()
+
+    processes = [
+        multiprocessing.Process(
+            target=_run_island,
+            args=(i, reference, shape_count, configs[i], inboxes, reports, topology, migration_interval, migrant_count),
+            daemon=True
+        )
+        for i in range(island_count)
+    ]
+    for process in processes:
+        process.start()
+
+    running = set(range(island_count))
+    # Islands found dead on the last check, their final report may still be on its way.
+    dead: Set[int] = set()
+    try:
+        while running:
+            try:
+                report: IslandReport = reports.get(timeout=_LIVENESS_CHECK_INTERVAL)
+            except queue.Empty:
+                # A dead process flushed everything it sent before exiting, so an island that was
+                # already dead on the last check and didn't finish never will.
+                for island in dead & running:
+                    running.discard(island)
+                    yield _failed_report(island, f"process exited with code {processes[island].exitcode}")
+                dead = {island for island in running if not processes[island].is_alive()}
+                continue
+            if report["done"]:
+                running.discard(report["island"])
+            yield report
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+# Seconds without reports before checking whether the island processes are still alive.
+_LIVENESS_CHECK_INTERVAL = 5
+
+def _failed_report(island: int, error: str) -> IslandReport:
+    return {
+        "island": island, "gen": -1, "fitness": -1.0,
+        "vertices": None, "colors": None, "done": True, "error": error
+    }
+
+def _run_island(
+    island: int,
+    reference: SharedArraysHandle,
+    shape_count: int,
+    config: Dict[str, Any],
+    inboxes: List[Queue],
+    reports: Queue,
+    topology: Topology,
+    migration_interval: int,
+    migrant_count: int
+):
+    try:
+        _evolve_island(island, reference, shape_count, config, inboxes, reports, topology, migration_interval, migrant_count)
+    except Exception as e:
+        reports.put(_failed_report(island, repr(e)))
+        raise
+
+def _evolve_island(
+    island: int,
+    reference: SharedArraysHandle,
+    shape_count: int,
+    config: Dict[str, Any],
+    inboxes: List[Queue],
+    reports: Queue,
+    topology: Topology,
+    migration_interval: int,
+    migrant_count: int
+):
+    # Imported here, the genetic algorithm module imports this one.
+    from src.genetic_algorithm import ImageReconstructionGeneticAlgorithm
+
+    # Kept attached until the process exits, the image and the generator use its memory.
+    shared = SharedArrays.attach(reference)
+    rgba = shared.arrays["rgba"]
+    og_img = Image.frombuffer("RGBA", (rgba.shape[1], rgba.shape[0]), rgba, "raw", "RGBA", 0, 1)
+
+    genetic_algorithm = ImageReconstructionGeneticAlgorithm(og_img, shape_count, config)
+    genetic_algorithm._log_prefix = f"[island {island}] "
+    genetic_algorithm._reference = shared.arrays
+
+    targets = [inboxes[i] for i in neighbors(island, len(inboxes), topology)]
+    for target in targets:
+        # Don't wait at exit for migrants nobody is going to read.
+        target.cancel_join_thread()
+
+    def migrate(gen: Generator, gen_count: int):
+        if migration_interval <= 0 or (gen_count + 1) % migration_interval != 0:
+            return
+        # With no migrants the islands evolve on their own, they still report every interval.
+        if migrant_count > 0:
+            vertices, colors = gen.emigrants(migrant_count)
+            for target in targets:
+                try:
+                    target.put_nowait((vertices, colors))
+                except queue.Full:
+                    pass
+        while True:
+            try:
+                vertices, colors = inboxes[island].get_nowait()
+            except queue.Empty:
+                break
+            gen.immigrate(vertices, colors)
+
+        fittest = gen.fittest
+        reports.put({
+            "island": island, "gen": gen_count, "fitness": fittest.fitness,
+            "vertices": fittest.vertices, "colors": fittest.colors, "done": False, "error": None
+        })
+
+    summary, _ = genetic_algorithm.run(migrate)
+    best = summary["best"]
+    reports.put({
+        "island": island, "gen": summary["last"]["gen"], "fitness": best["fittest"].fitness,
+        "vertices": best["fittest"].vertices, "colors": best["fittest"].colors, "done": True, "error": None
+    })
@@ -0,0 +1,89 @@
+import queue
+import threading
+from enum import Enum
+from typing import Callable, Optional
+
+class QueueFullPolicy(Enum):
+    # Discard droppable output (snapshots) while the queue is full.
+    DROP = 1
+    # Wait until the writer makes room.
+    BLOCK = 2
+
+    @classmethod
+    def from_string(cls, name: str):
+        return cls[name.upper()]
+
+class OutputWriter:
+    """
+    Writes the output of a run (snapshots, history records, log lines) on a background thread, so the
+    evolution loop doesn't wait on the disk or on PNG encoding. Tasks run one at a time in the order they
+    were submitted, at most `max_size` of them wait at once.
+
+    When the queue is full, droppable tasks follow `policy`; the rest (history records, logs) always wait
+    for room, they're needed to resume a run. An error raised by a task stops the writer and is raised
+    again (once) on the caller's next `submit`, `flush` or `close`.
+    """
+    def __init__(self, max_size: int, policy: QueueFullPolicy = QueueFullPolicy.BLOCK) -> None:
+        self.policy = policy
+        # Droppable tasks discarded because the queue was full.
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue(maxsize=max(1, max_size))
+        self._error: Optional[BaseException] = None
+        self._failed = False
+        self._thread = threading.Thread(target=self._work, name="output-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, task: Callable[[], None], droppable: bool = False):
+        """
+        @param `task`: Called on the writer thread. It must only use data nothing else changes afterwards.
+        """
+        self._raise_error()
+        if droppable and self.policy == QueueFullPolicy.DROP:
+            try:
+                self._queue.put_nowait(task)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            self._queue.put(task)
+
+    def flush(self):
+        """
+        Wait until every task submitted so far ran.
+        """
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Run the pending tasks and stop the thread.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                # After an error the remaining tasks are skipped, only waiting callers are released.
+                if not self._failed:
+                    task()
+            except BaseException as e:
+                self._error = e
+                self._failed = True
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Writing the output of the run failed.") from error
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
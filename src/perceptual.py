@@ -0,0 +1,26 @@
+import numpy as np
+
+# The skimage Lab conversion and colour's delta E, used by the delta_D fitness with the skimage Lab
+# backend. Importing them takes seconds (colour alone pulls in scipy and its plotting setup), so they're
+# only imported the first time they're needed, see `load`.
+
+def load():
+    """
+    Import the perceptual stack now instead of on the first conversion, e.g. before timing anything.
+    """
+    import skimage.color
+    import colour.difference.delta_e
+
+def rgb2lab(rgb: np.ndarray) -> np.ndarray:
+    """
+    `skimage.color.rgb2lab`.
+    """
+    from skimage.color import rgb2lab
+    return rgb2lab(rgb)
+
+def delta_E_CIE1976(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """
+    `colour.difference.delta_E_CIE1976`.
+    """
+    from colour.difference.delta_e import delta_E_CIE1976
+    return delta_E_CIE1976(lab1, lab2)
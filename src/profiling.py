@@ -0,0 +1,77 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List, TypedDict
+
+class PhaseStats(TypedDict):
+    # Seconds spent in the phase, not counting the phases timed inside it.
+    time: float
+    count: int
+
+# Phases timed by `Generator`, in the order they run.
+PHASES = ("selection", "crossover", "mutation", "replacement", "render", "lab", "fitness")
+
+_DISABLED = nullcontext()
+
+class PhaseTimer:
+    """
+    Wall time and amount of calls of the phases of a generation (selection, render, fitness...).
+    Phases can be nested, e.g. a render inside a fitness evaluation, each one only gets its own time.
+    They may run on several threads at once.
+
+    When disabled every method returns right away, so the instrumented code can always call it.
+    """
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[str, PhaseStats] = {}
+        self._totals: Dict[str, PhaseStats] = {}
+
+    def phase(self, name: str, count: int = 1) -> ContextManager[None]:
+        """
+        @param `count`: Calls the phase counts as, e.g. the individuals of a batch.
+        """
+        if not self.enabled:
+            return _DISABLED
+        return self._timed(name, count)
+
+    @contextmanager
+    def _timed(self, name: str, count: int) -> Iterator[None]:
+        # Time of the phases nested in each running one, per thread.
+        stack: List[float] = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                stats = self._stats.setdefault(name, {"time": 0.0, "count": 0})
+                stats["time"] += elapsed - nested
+                stats["count"] += count
+
+    def take(self) -> Dict[str, PhaseStats]:
+        """
+        @returns The stats of every phase since the last call, they're added to `totals` and reset.
+        """
+        if not self.enabled:
+            return {}
+        with self._lock:
+            stats, self._stats = self._stats, {}
+            for name, phase in stats.items():
+                total = self._totals.setdefault(name, {"time": 0.0, "count": 0})
+                total["time"] += phase["time"]
+                total["count"] += phase["count"]
+        return stats
+
+    @property
+    def totals(self) -> Dict[str, PhaseStats]:
+        """
+        Stats of every phase over all the calls to `take`.
+        """
+        with self._lock:
+            return {name: dict(phase) for name, phase in self._totals.items()}
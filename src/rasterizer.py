@@ -0,0 +1,250 @@
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Software rasterizer for the genes, an alternative to drawing them with cairo. It draws flat colored
+# polygons with the OVER operator into frames laid out like a cairo ARGB32 surface (premultiplied BGRA),
+# rounding to 8 bits after every shape like cairo does.
+#
+# Coverage is computed for many shapes of a batch at once, by scanlines: every pixel row is crossed by
+# `supersample` sample lines, on each one the spans inside the polygon (non-zero winding rule, cairo's
+# default) go between the x where its edges cross the line, and every pixel gets the exact length of those
+# spans that falls inside it. So the coverage is exact horizontally and sampled vertically. The spans are
+# added as start/end steps to one buffer per row of every shape, integrated with a single cumulative sum.
+# Only compositing goes shape by shape, each one is drawn over the result of the previous ones.
+# Axis-aligned rectangles with integer corners (new squares) cover whole pixels and skip the coverage.
+
+DEFAULT_SUPERSAMPLE = 4
+
+# Amount of coverage values computed at once, bounds the temporary arrays of a batch of big shapes.
+_CHUNK_PIXELS = 1 << 20
+
+class RenderBackend(Enum):
+    CAIRO = 1
+    NUMPY = 2
+
+    @classmethod
+    def from_string(cls, name: str):
+        return cls[name.upper()]
+
+def render_batch(
+    vertices: np.ndarray,
+    colors: np.ndarray,
+    img_size: Tuple[int, int],
+    supersample: int = DEFAULT_SUPERSAMPLE,
+    out: Optional[List[np.ndarray]] = None
+) -> List[np.ndarray]:
+    """
+    Draw the genes of a batch of individuals.
+
+    @param `vertices: np.ndarray`: `(count, shape_count, vertex_count, 2)` genes.
+    @param `colors: np.ndarray`: `(count, shape_count, 4)` RGBA genes.
+    @param `supersample: int`: Sample lines per pixel row.
+    @param `out: List[np.ndarray]`: Zeroed frames to draw into instead of allocating new ones.
+    @returns `List[np.ndarray]`: `(height, width, 4)` `uint8` frame of every individual, in cairo's
+    premultiplied BGRA order. Each one is its own array, so keeping one doesn't keep the others alive.
+    """
+    width, height = img_size
+    frames = out if out is not None else [np.zeros((height, width, 4), dtype=np.uint8) for _ in range(len(vertices))]
+    if len(vertices) == 0:
+        return frames
+    shape_count = vertices.shape[1]
+
+    # Every shape of the batch, individual by individual in draw order.
+    polygons = vertices.reshape(-1, *vertices.shape[2:])
+    alpha = colors.reshape(-1, 4)[:, 3].astype(np.float32)
+    # Premultiplied BGRA source of every shape, in 8-bit units.
+    sources = np.concatenate((colors[..., 2::-1] * colors[..., 3:], colors[..., 3:]), axis=-1) * 255
+    sources = sources.reshape(-1, 4).astype(np.float32)
+
+    # Bounding boxes. Vertices are integers, so no pixel outside them is touched even with antialiasing.
+    lows = np.clip(polygons.min(axis=1), 0, img_size)
+    highs = np.clip(polygons.max(axis=1), 0, img_size)
+    drawn = np.flatnonzero(((highs - lows) > 0).all(axis=1) & (alpha > 0))
+    rectangles = _axis_aligned_rectangles(polygons)
+
+    # Shapes that need their coverage, split in chunks whose boxes add up to about `_CHUNK_PIXELS`.
+    covered = drawn[~rectangles[drawn]]
+    areas = np.cumsum((highs[covered, 1] - lows[covered, 1]) * (highs[covered, 0] - lows[covered, 0] + 2))
+    coverage: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    chunk_start = 0
+    for index in drawn:
+        frame = frames[index // shape_count]
+        (x0, y0), (x1, y1) = lows[index], highs[index]
+        if rectangles[index]:
+            _blend(frame[y0:y1, x0:x1], sources[index], alpha[index], None)
+            continue
+        if index not in coverage:
+            done = areas[chunk_start - 1] if chunk_start > 0 else 0
+            chunk_end = max(chunk_start + 1, int(np.searchsorted(areas, done + _CHUNK_PIXELS, side="right")))
+            coverage = _coverage(polygons, covered[chunk_start:chunk_end], lows, highs, width, supersample)
+            chunk_start = chunk_end
+        # Only the pixels the spans touch, as whole BGRA pixels of the flattened frame.
+        pixels, pixel_coverage = coverage.pop(index)
+        frame_pixels = frame.reshape(-1).view(np.uint32)
+        region = frame_pixels[pixels].view(np.uint8).reshape(-1, 4)
+        frame_pixels[pixels] = _blend(region, sources[index], alpha[index], pixel_coverage).view(np.uint32).reshape(-1)
+    return frames
+
+def _axis_aligned_rectangles(vertices: np.ndarray) -> np.ndarray:
+    """
+    @returns `np.ndarray`: Mask of the shapes that are rectangles with sides parallel to the axes.
+    """
+    if vertices.shape[-2] != 4:
+        return np.zeros(vertices.shape[:-2], dtype=bool)
+    x, y = vertices[..., 0], vertices[..., 1]
+    # Consecutive corners share x and y alternately, starting with either.
+    horizontal_first = (
+        (y[..., 0] == y[..., 1]) & (x[..., 1] == x[..., 2]) & (y[..., 2] == y[..., 3]) & (x[..., 3] == x[..., 0])
+    )
+    vertical_first = (
+        (x[..., 0] == x[..., 1]) & (y[..., 1] == y[..., 2]) & (x[..., 2] == x[..., 3]) & (y[..., 3] == y[..., 0])
+    )
+    return horizontal_first | vertical_first
+
+def _coverage(
+    polygons: np.ndarray, indices: np.ndarray, lows: np.ndarray, highs: np.ndarray, width: int, supersample: int
+) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """
+    @returns `Dict[int, Tuple[np.ndarray, np.ndarray]]`: For every polygon of `indices`, `(pixels, coverage)`:
+    the index in a flattened frame of every pixel its spans touch, row by row, and the `float32` fraction
+    of each one inside the polygon, by its winding number.
+    """
+    x0, y0 = lows[indices, 0], lows[indices, 1]
+    x1 = highs[indices, 0]
+    rows = highs[indices, 1] - y0
+
+    # One sample line per `supersample` of every row of every shape, at the center of its slice of the row.
+    lines = rows * supersample
+    shape_of_line = np.repeat(np.arange(len(indices)), lines)
+    line = _ragged_arange(lines)
+    ys = np.repeat(y0, lines) + (line + 0.5) / supersample
+
+    line_x0, line_x1 = np.repeat(x0, lines), np.repeat(x1, lines)
+    points = polygons[indices].astype(np.float64)
+    if points.shape[1] == 3:
+        left, right = _triangle_spans(points, lines, ys)
+        np.clip(left, line_x0, line_x1, out=left)
+        np.clip(right, line_x0, line_x1, out=right)
+        span_line = np.flatnonzero(right > left)
+        left, right = left[span_line], right[span_line]
+    else:
+        span_line, left, right = _polygon_spans(points, lines, ys)
+        left = np.clip(left, line_x0[span_line], line_x1[span_line])
+        right = np.clip(right, line_x0[span_line], line_x1[span_line])
+        inside = right > left
+        span_line, left, right = span_line[inside], left[inside], right[inside]
+    left_pixel, right_pixel = np.floor(left), np.floor(right)
+    left_frac, right_frac = left - left_pixel, right - right_pixel
+    left_pixel, right_pixel = left_pixel.astype(np.int64), right_pixel.astype(np.int64)
+
+    # Pixel rows with some span (spans come sorted by row), and the pixels between their first and last step
+    # that are in the image.
+    span_row = shape_of_line[span_line] * (rows.max() + 1) + line[span_line] // supersample
+    row_first = np.flatnonzero(np.diff(span_row, prepend=-1))
+    row_shape = shape_of_line[span_line[row_first]]
+    row_y = y0[row_shape] + line[span_line[row_first]] // supersample
+    row_lo = np.minimum.reduceat(left_pixel, row_first)
+    row_pixels = np.minimum(np.maximum.reduceat(right_pixel, row_first) + 1, x1[row_shape]) - row_lo
+    row_start = np.concatenate(([0], np.cumsum(row_pixels)))
+    spans = np.diff(np.append(row_first, len(span_row)))
+    span_offset = np.repeat(row_start[:-1] - row_lo, spans)
+    span_end = np.repeat(row_start[1:], spans)
+
+    # A span adds `1 - frac` of its start pixel, `frac` of the next one and 1 of every pixel after those; its
+    # end takes the same off. Summed over the row's lines and integrated, that's the covered length per pixel.
+    # The steps of a row add up to 0, so the ones past its last pixel can go to the next row's first one.
+    left_pixel += span_offset
+    right_pixel += span_offset
+    steps = np.bincount(
+        np.minimum(np.concatenate((left_pixel, left_pixel + 1, right_pixel, right_pixel + 1)), np.tile(span_end, 4)),
+        np.concatenate((1 - left_frac, left_frac, right_frac - 1, -right_frac)) / supersample,
+        minlength=row_start[-1] + 1
+    )
+    # Off [0, 1] only by rounding, which `_blend` doesn't mind.
+    coverage = np.cumsum(steps[:-1]).astype(np.float32)
+    pixels = np.arange(row_start[-1]) + np.repeat(row_y * width + row_lo - row_start[:-1], row_pixels)
+
+    shape_ends = row_start[np.searchsorted(row_shape, np.arange(len(indices)), side="right")]
+    shape_starts = np.concatenate(([0], shape_ends[:-1]))
+    return {
+        int(index): (pixels[shape_starts[i]:shape_ends[i]], coverage[shape_starts[i]:shape_ends[i]])
+        for i, index in enumerate(indices)
+    }
+
+def _triangle_spans(points: np.ndarray, lines: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    @param `points`: `(count, 3, 2)` triangles.
+    @param `lines`: Amount of lines of every triangle, at heights `ys`.
+    @returns `(left, right)`: Where every line enters and leaves its triangle, `left >= right` when it doesn't
+    cross it. A triangle is convex, so that's between the edge from its top to its bottom vertex and one of the
+    other two.
+    """
+    order = np.argsort(points[..., 1], axis=1, kind="stable")
+    (top_x, mid_x, bottom_x), (top_y, mid_y, bottom_y) = np.take_along_axis(points, order[..., None], axis=1).T
+
+    def edge(ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # `x = offset + y * slope` of the line through both points (horizontal edges are never used).
+        slope = np.divide(bx - ax, by - ay, out=np.zeros_like(ax), where=by != ay)
+        return np.repeat(ax - ay * slope, lines), np.repeat(slope, lines)
+
+    long_offset, long_slope = edge(top_x, top_y, bottom_x, bottom_y)
+    upper_offset, upper_slope = edge(top_x, top_y, mid_x, mid_y)
+    lower_offset, lower_slope = edge(mid_x, mid_y, bottom_x, bottom_y)
+    upper = ys < np.repeat(mid_y, lines)
+    long_x = long_offset + ys * long_slope
+    short_x = np.where(upper, upper_offset, lower_offset) + ys * np.where(upper, upper_slope, lower_slope)
+    left, right = np.minimum(long_x, short_x), np.maximum(long_x, short_x)
+    # Lines above the top vertex or at or below the bottom one (the partial first and last rows) miss it.
+    outside = (ys < np.repeat(top_y, lines)) | (ys >= np.repeat(bottom_y, lines))
+    right[outside] = -np.inf
+    return left, right
+
+def _polygon_spans(points: np.ndarray, lines: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    @param `points`: `(count, vertex_count, 2)` polygons.
+    @param `lines`: Amount of lines of every polygon, at heights `ys`.
+    @returns `(line, left, right)`: Every span of a line inside its polygon (by the non-zero winding rule),
+    sorted by line.
+    """
+    ys = ys[:, None]
+    ax, ay = points[..., 0], points[..., 1]
+    bx, by = np.roll(ax, -1, axis=1), np.roll(ay, -1, axis=1)
+    # Where every edge crosses every line of its polygon, and which way (+1 going down, -1 going up).
+    # Horizontal edges never cross a line.
+    slope = np.divide(bx - ax, by - ay, out=np.zeros_like(ax), where=by != ay)
+    crosses = (np.repeat(np.minimum(ay, by), lines, axis=0) <= ys) & (ys < np.repeat(np.maximum(ay, by), lines, axis=0))
+    xs = np.repeat(ax - ay * slope, lines, axis=0) + ys * np.repeat(slope, lines, axis=0)
+    xs[~crosses] = np.inf
+    directions = np.where(crosses, np.repeat(np.where(ay < by, 1, -1), lines, axis=0), 0)
+
+    # Between consecutive crossings (from left to right) the line is inside if the winding number isn't 0.
+    order = np.argsort(xs, axis=1)
+    xs = np.take_along_axis(xs, order, axis=1)
+    winding = np.cumsum(np.take_along_axis(directions, order, axis=1), axis=1)[:, :-1]
+    line, span = np.nonzero((winding != 0) & np.isfinite(xs[:, 1:]))
+    return line, xs[line, span], xs[line, span + 1]
+
+def _ragged_arange(lengths: np.ndarray) -> np.ndarray:
+    """
+    @returns `np.ndarray`: `0, 1, ..., length - 1` for every length, one after the other.
+    """
+    return np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+def _blend(region: np.ndarray, source: np.ndarray, alpha: float, coverage: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Composite `source` (premultiplied, in 8-bit units) OVER `region` in place, scaled by `coverage`
+    (`None` for full coverage).
+
+    @returns `np.ndarray`: `region`.
+    """
+    # region + coverage * (source - alpha * region), never outside [0, 255] with a premultiplied source.
+    blended = region.astype(np.float32)
+    difference = blended * np.float32(-alpha)
+    difference += source
+    if coverage is not None:
+        difference *= coverage[..., None]
+    blended += difference
+    np.rint(blended, out=blended)
+    region[:] = blended
+    return region
@@ -0,0 +1,65 @@
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple, TypedDict
+import numpy as np
+
+class SharedArraysHandle(TypedDict):
+    name: str
+    # `(key, shape, dtype, offset)` of every array in the block.
+    layout: List[Tuple[str, Tuple[int, ...], str, int]]
+
+# Offset alignment of every array in the block.
+_ALIGNMENT = 64
+
+class SharedArrays:
+    """
+    Read-only NumPy arrays in one `multiprocessing.shared_memory` block, so several processes can use
+    them while the memory exists once. The process that `create`s them owns the block and frees it with
+    `close`; the others `attach` to it with its `handle` (picklable) and must not use it after that.
+    """
+    def __init__(self, block: shared_memory.SharedMemory, layout: List[Tuple[str, Tuple[int, ...], str, int]], owner: bool) -> None:
+        self._block = block
+        self._layout = layout
+        self._owner = owner
+        self.arrays: Dict[str, np.ndarray] = {}
+        for key, shape, dtype, offset in layout:
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            array.flags.writeable = False
+            self.arrays[key] = array
+
+    @classmethod
+    def create(cls, arrays: Dict[str, np.ndarray]) -> "SharedArrays":
+        layout: List[Tuple[str, Tuple[int, ...], str, int]] = []
+        size = 0
+        for key, array in arrays.items():
+            layout.append((key, tuple(array.shape), array.dtype.str, size))
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+        block = shared_memory.SharedMemory(create=True, size=max(1, size))
+        for (key, shape, dtype, offset), array in zip(layout, arrays.values()):
+            np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)[...] = array
+        return cls(block, layout, owner=True)
+
+    @classmethod
+    def attach(cls, handle: SharedArraysHandle) -> "SharedArrays":
+        # Attaching registers the block with the resource tracker as if this process had created it. The
+        # processes started by `multiprocessing` share the creator's tracker, where that's a no-op.
+        block = shared_memory.SharedMemory(name=handle["name"])
+        return cls(block, handle["layout"], owner=False)
+
+    @property
+    def handle(self) -> SharedArraysHandle:
+        return {"name": self._block.name, "layout": self._layout}
+
+    def close(self):
+        """
+        Stop using the block, and free it if this process created it. No views of `arrays` may be alive.
+        """
+        self.arrays = {}
+        self._block.close()
+        if self._owner:
+            self._block.unlink()
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,35 @@
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*\d+\s*\|\s*(\S+)$")
+
+def import_profile(statement: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Run `statement` (e.g. `"import numpy"`) in a new interpreter with `-X importtime`, so nothing this
+    process already imported is left out.
+
+    @returns `(total, packages)`: Seconds spent importing, interpreter startup included, and the seconds of
+    every top level package (`numpy`, `PIL`, `src`...) over all its modules, from the slowest one.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        # Each module's own time, without the modules it imports: they're counted in their own package.
+        package = match.group(2).split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(match.group(1)) / 1e6
+    return sum(packages.values()), sorted(packages.items(), key=lambda entry: entry[1], reverse=True)
+
+def print_import_profile(statement: str, top: int = 10):
+    total, packages = import_profile(statement)
+    print(f"{statement}: {total:.3f} s")
+    for name, seconds in packages[:top]:
+        print(f"  {name:<30} {seconds:8.3f} s")
@@ -0,0 +1,67 @@
+import threading
+from typing import List, Tuple, Union
+import cairo
+import numpy as np
+
+class SurfacePool:
+    """
+    Reusable canvases of one size: cairo surfaces and the NumPy frames of the NumPy rasterizer.
+    Individuals borrow one to render and give it back when they release their pixels, so a generation
+    doesn't allocate a new full size canvas per child. At most `max_size` idle canvases of each kind
+    are kept; canvases of another size (after `resize`) are dropped when given back.
+    """
+    def __init__(self, img_size: Tuple[int, int], max_size: int) -> None:
+        self.img_size = img_size
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._surfaces: List[cairo.ImageSurface] = []
+        self._frames: List[np.ndarray] = []
+        # Canvases created because none was idle.
+        self.allocations = 0
+
+    def resize(self, img_size: Tuple[int, int]):
+        with self._lock:
+            self.img_size = img_size
+            self._surfaces = []
+            self._frames = []
+
+    def surface(self) -> cairo.ImageSurface:
+        """
+        @returns `cairo.ImageSurface`: A transparent ARGB32 surface of `img_size`.
+        """
+        with self._lock:
+            surface = self._surfaces.pop() if self._surfaces else None
+            if surface is None:
+                self.allocations += 1
+        if surface is None:
+            return cairo.ImageSurface(cairo.FORMAT_ARGB32, *self.img_size)
+        surface.flush()
+        np.frombuffer(surface.get_data(), dtype=np.uint8)[:] = 0
+        surface.mark_dirty()
+        return surface
+
+    def frame(self) -> np.ndarray:
+        """
+        @returns `np.ndarray`: A zeroed `(height, width, 4)` `uint8` frame of `img_size`.
+        """
+        with self._lock:
+            frame = self._frames.pop() if self._frames else None
+            if frame is None:
+                self.allocations += 1
+        if frame is None:
+            width, height = self.img_size
+            return np.zeros((height, width, 4), dtype=np.uint8)
+        frame.fill(0)
+        return frame
+
+    def give_back(self, canvas: Union[cairo.ImageSurface, np.ndarray]):
+        """
+        Return a canvas from `surface` or `frame`. Nothing may use it (or views of it) afterwards.
+        """
+        width, height = self.img_size
+        with self._lock:
+            if isinstance(canvas, np.ndarray):
+                if canvas.shape == (height, width, 4) and len(self._frames) < self.max_size:
+                    self._frames.append(canvas)
+            elif (canvas.get_width(), canvas.get_height()) == self.img_size and len(self._surfaces) < self.max_size:
+                self._surfaces.append(canvas)
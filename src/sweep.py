@@ -0,0 +1,187 @@
+import csv
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Set, TypedDict
+from PIL import Image
+
+# Memory of a worker process before it evolves anything (interpreter, NumPy, skimage...).
+_PROCESS_BASE_BYTES = 150 * 1024**2
+# Times a job is run again after its worker process died while it ran alone, before it counts as failed.
+_POOL_CRASH_RETRIES = 2
+
+class SweepJob(TypedDict):
+    key: str
+    image: str
+    shape_count: int
+    seed: int
+    # Options that replace the ones in `configs/config.json` for this job.
+    config: Dict[str, Any]
+
+def expand_jobs(sweep: Dict[str, Any]) -> List[SweepJob]:
+    """
+    Every combination of `images`, `shape_counts`, `seeds` and configs of a sweep definition. The configs
+    are the cartesian product of the option lists in `grid` plus every entry of `configs` (`[{}]` if there's
+    neither).
+    """
+    configs: List[Dict[str, Any]] = list(sweep.get("configs", []))
+    grid: Dict[str, List[Any]] = sweep.get("grid", {})
+    if grid:
+        names = list(grid.keys())
+        configs += [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    if not configs:
+        configs = [{}]
+
+    jobs: List[SweepJob] = []
+    for image, shape_count, seed, config in itertools.product(sweep["images"], sweep["shape_counts"], sweep["seeds"], configs):
+        jobs.append({
+            "key": job_key(image, shape_count, seed, config),
+            "image": image, "shape_count": shape_count, "seed": seed, "config": config
+        })
+    return jobs
+
+def job_key(image: str, shape_count: int, seed: int, config: Dict[str, Any]) -> str:
+    """
+    @returns `str`: Identifier of a job, the same for the same image, shape count, seed and config.
+    """
+    description = json.dumps([image, shape_count, seed, config], sort_keys=True)
+    return hashlib.blake2b(description.encode(), digest_size=8).hexdigest()
+
+def estimate_memory(job: SweepJob, base_config: Dict[str, Any]) -> int:
+    """
+    @returns `int`: Rough peak bytes of a job's process: every individual of a generation with its surface,
+    render checkpoints and error map, the reference in the fitness' formats and the process itself.
+    """
+    config = dict(base_config)
+    config.update(job["config"])
+    with Image.open(job["image"]) as img:
+        width, height = img.size
+    frame = width * height * 4
+    interval = config["render_checkpoint_interval"]
+    checkpoints = job["shape_count"] // interval if interval > 0 else 0
+    error_map = width * height * 4 if config["delta_fitness"] else 0
+    individuals = config["population_amount"] + config["generated_child_amount"]
+    workers = max(1, config["evaluation_workers"])
+    return _PROCESS_BASE_BYTES + individuals * (frame * (1 + checkpoints) + error_map) + width * height * 8 * 4 * workers
+
+def finished_keys(results_path: str) -> Set[str]:
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, "r", newline="") as f:
+        return {row["key"] for row in csv.DictReader(f)}
+
+def run_job(job: SweepJob, curves_dir: str) -> Dict[str, Any]:
+    """
+    Run one job, its per-generation history goes to `curves_dir/<key>.csv`.
+
+    @returns The job's row of the results file.
+    """
+    # Imported here so the pool's processes load it themselves.
+    from src.genetic_algorithm import ImageReconstructionGeneticAlgorithm
+
+    curves_path = os.path.join(curves_dir, f"{job['key']}.csv")
+    config = dict(job["config"])
+    config.update({"seed": job["seed"], "history_path": curves_path, "checkpoint_interval": 0, "snapshot_interval": 0})
+    img = Image.open(job["image"]).convert("RGBA")
+    genetic_algorithm = ImageReconstructionGeneticAlgorithm(img, job["shape_count"], config)
+    genetic_algorithm._log_prefix = f"[{job['key']}] "
+    summary, elapsed_time = genetic_algorithm.run()
+
+    best = summary["best"] or summary["last"]
+    return {
+        "key": job["key"],
+        "image": job["image"],
+        "shape_count": job["shape_count"],
+        "seed": job["seed"],
+        "config": json.dumps(job["config"], sort_keys=True),
+        "fitness": best["fittest"].fitness if best is not None else None,
+        "best_gen": best["gen"] if best is not None else None,
+        "generations": summary["last"]["gen"] + 1 if summary["last"] is not None else 0,
+        "time": elapsed_time,
+        "curves": curves_path,
+    }
+
+RESULT_FIELDS = ["key", "image", "shape_count", "seed", "config", "fitness", "best_gen", "generations", "time", "curves"]
+
+def run_sweep(
+    jobs: List[SweepJob], results_path: str, curves_dir: str, max_workers: int, max_memory: int
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run the jobs that aren't in `results_path` yet, at most `max_workers` at once and, as far as their
+    estimated memory goes, within `max_memory` bytes (a job always runs if nothing else is running).
+    Every finished job is appended to the results file right away, so an interrupted sweep can be run
+    again and continues where it was. If a worker process dies (e.g. killed for running out of memory) the
+    pool is recreated and the jobs that were running are queued again. They run alone from then on, so a
+    crash can be blamed on one job, which fails after `_POOL_CRASH_RETRIES` retries.
+
+    @returns An iterator of the result rows, as the jobs finish.
+    """
+    done = finished_keys(results_path)
+    pending = [job for job in jobs if job["key"] not in done]
+    os.makedirs(curves_dir, exist_ok=True)
+    with open("./configs/config.json", "r") as f:
+        base_config = json.load(f)
+    estimates = {job["key"]: estimate_memory(job, base_config) for job in pending}
+
+    write_header = not os.path.exists(results_path) or os.path.getsize(results_path) == 0
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    crashes: Dict[str, int] = {}
+    # Jobs that were running when a worker died, each one runs alone.
+    suspects: Set[str] = set()
+    try:
+        with open(results_path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            if write_header:
+                writer.writeheader()
+                f.flush()
+
+            running: Dict[Future, SweepJob] = {}
+            used_memory = 0
+            while pending or running:
+                while pending and len(running) < max_workers and (not running or (
+                    used_memory + estimates[pending[0]["key"]] <= max_memory and pending[0]["key"] not in suspects
+                    and not any(job["key"] in suspects for job in running.values())
+                )):
+                    job = pending.pop(0)
+                    running[executor.submit(run_job, job, curves_dir)] = job
+                    used_memory += estimates[job["key"]]
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                interrupted: List[SweepJob] = []
+                for future in finished:
+                    job = running.pop(future)
+                    used_memory -= estimates[job["key"]]
+                    try:
+                        row = future.result()
+                    except BrokenProcessPool:
+                        interrupted.append(job)
+                        continue
+                    except Exception as e:
+                        print(f"job {job['key']} failed: {e!r}")
+                        continue
+                    writer.writerow(row)
+                    f.flush()
+                    yield row
+
+                if interrupted:
+                    # Every job still running in the broken pool fails too, there's no telling which one killed it.
+                    interrupted += running.values()
+                    running = {}
+                    used_memory = 0
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = ProcessPoolExecutor(max_workers=max_workers)
+                    if len(interrupted) == 1:
+                        key = interrupted[0]["key"]
+                        crashes[key] = crashes.get(key, 0) + 1
+                        if crashes[key] > _POOL_CRASH_RETRIES:
+                            print(f"job {key} failed: its worker process died {crashes[key]} times")
+                            interrupted = []
+                    for job in interrupted:
+                        print(f"job {job['key']} interrupted by a dead worker process, queued again")
+                        suspects.add(job["key"])
+                    pending = interrupted + pending
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,22 @@
+import json
+import argparse
+import os
+from src.sweep import expand_jobs, finished_keys, run_sweep
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a grid of genetic image generator configurations.")
+    parser.add_argument("--sweep", "-S", type=str, default="configs/sweep.json", help="Archivo con las imágenes, figuras, semillas y configuraciones a probar.")
+    parser.add_argument("--results", "-o", type=str, default="./generated/sweep.csv", help="Archivo CSV donde se guardan los resultados.")
+    parser.add_argument("--curves", "-c", type=str, default="./generated/sweep_curves", help="Carpeta donde se guarda el historial de cada corrida.")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1, help="Cantidad máxima de corridas a la vez.")
+    parser.add_argument("--max_memory", "-m", type=int, default=4096, help="Memoria estimada máxima (MB) de las corridas a la vez.")
+    args = parser.parse_args()
+
+    with open(args.sweep, "r") as f:
+        sweep = json.load(f)
+
+    jobs = expand_jobs(sweep)
+    skipped = len(finished_keys(args.results) & {job["key"] for job in jobs})
+    print(f"{len(jobs)} jobs, {skipped} already finished")
+    for row in run_sweep(jobs, args.results, args.curves, args.workers, args.max_memory * 1024**2):
+        print(f"{row['key']} {row['image']} {row['shape_count']} seed {row['seed']} {row['config']}: {row['fitness']} in {row['time']:.1f}s")